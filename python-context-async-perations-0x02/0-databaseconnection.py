@@ -1,21 +1,29 @@
 import mysql.connector
 
 class DatabaseConnection:
-    def __init__(self, host, user, password, database):
+    def __init__(self, host, user, password, database, pool=None):
+        """
+        When `pool` is given (e.g. seed.get_pool()), the connection is
+        borrowed from it and returned on exit instead of being reopened.
+        """
         self.host = host
         self.user = user
         self.password = password
         self.database = database
+        self.pool = pool
         self.connection = None
         self.cursor = None
 
     def __enter__(self):
-        self.connection = mysql.connector.connect(
-            host=self.host,
-            user=self.user,
-            password=self.password,
-            database=self.database
-        )
+        if self.pool is not None:
+            self.connection = self.pool.acquire()
+        else:
+            self.connection = mysql.connector.connect(
+                host=self.host,
+                user=self.user,
+                password=self.password,
+                database=self.database
+            )
         self.cursor = self.connection.cursor()
         print("Database connection opened.")
         return self.cursor
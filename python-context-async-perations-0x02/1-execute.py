@@ -1,19 +1,23 @@
 import mysql.connector
 
 class ExecuteQuery:
-    def __init__(self, query, params=None):
+    def __init__(self, query, params=None, pool=None):
         self.query = query
         self.params = params
+        self.pool = pool
         self.connection = None
         self.cursor = None
 
     def __enter__(self):
-        self.connection = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="your_password",  
-            database="ALX_prodev"
-        )
+        if self.pool is not None:
+            self.connection = self.pool.acquire()
+        else:
+            self.connection = mysql.connector.connect(
+                host="localhost",
+                user="root",
+                password="your_password",  
+                database="ALX_prodev"
+            )
         self.cursor = self.connection.cursor()
         print("Database connection opened.")
 
@@ -1,18 +1,16 @@
+import logging
 import sqlite3
-import functools
-from datetime import datetime  # required for logging time
+from instrumentation import QueryRecorder
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+# Events are buffered and written to the "queries" logger by a background
+# thread; lower sample_rate to record only a fraction of calls.
+query_log = QueryRecorder(interval=1.0, sample_rate=1.0)
 
 def log_queries(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        query = kwargs.get("query") or (args[0] if args else None)
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        if query:
-            print(f"[{timestamp}] Executing SQL Query: {query}")
-        else:
-            print(f"[{timestamp}] No SQL query found.")
-        return func(*args, **kwargs)
-    return wrapper
+    """Record fingerprint, parameter count, duration, rows and caller of each query."""
+    return query_log.instrument(func)
 
 
 @log_queries
@@ -26,4 +24,5 @@ def fetch_all_users(query):
 
 
 users = fetch_all_users(query="SELECT * FROM users")
-print(users)
\ No newline at end of file
+print(users)
+query_log.flush()
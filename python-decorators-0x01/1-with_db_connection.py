@@ -1,12 +1,19 @@
 import sqlite3 
 import functools
 
-def with_db_connection(func):
+def with_db_connection(func=None, *, pool=None):
+    """
+    Pass a sqlite_pool.ThreadLocalPool as `pool` to reuse the calling
+    thread's connection instead of opening one per call.
+    """
+    if func is None:
+        return functools.partial(with_db_connection, pool=pool)
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         conn = None
         try:
-            conn = sqlite3.connect('users.db')
+            conn = pool.acquire() if pool is not None else sqlite3.connect('users.db')
             print("Database connection opened.")
             
             result = func(conn, *args, **kwargs)
@@ -15,7 +22,9 @@ def with_db_connection(func):
             print(f"An error occurred: {e}")
             raise
         finally:
-            if conn:
+            if conn and pool is not None:
+                pool.release(conn)
+            elif conn:
                 conn.close()
                 print("Database connection closed.")
     return wrapper
@@ -1,32 +1,55 @@
 import sqlite3 
 import functools
+from query_cache import WriteTracker
+
+def with_db_connection(func=None, *, pool=None):
+    """
+    Pass a sqlite_pool.ThreadLocalPool as `pool` to reuse the calling
+    thread's connection instead of opening one per call.
+    """
+    if func is None:
+        return functools.partial(with_db_connection, pool=pool)
 
-def with_db_connection(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         conn = None
         try:
-            conn = sqlite3.connect('users.db')
+            conn = pool.acquire() if pool is not None else sqlite3.connect('users.db')
             result = func(conn, *args, **kwargs)
             return result
         except Exception as e:
             print(f"An error occurred: {e}")
             raise
         finally:
-            if conn:
+            if conn and pool is not None:
+                pool.release(conn)
+            elif conn:
                 conn.close()
     return wrapper
 
-def transactional(func):
+def transactional(func=None, *, group=None):
+    """
+    Pass a group_commit.GroupCommit as `group` to fold concurrent calls
+    into one transaction instead of committing once per call.
+    """
+    if func is None:
+        return functools.partial(transactional, group=group)
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         conn = args[0]
+        if group is not None:
+            return group.run(func, conn, args[1:], kwargs)
+        # Cached reads of the tables written here are evicted on commit.
+        writes = WriteTracker(conn)
         try:
             result = func(*args, **kwargs)
             conn.commit()
+            writes.publish()
             print("Transaction committed.")
             return result
         except Exception as e:
+            writes.stop()
             conn.rollback()
             print(f"Transaction rolled back due to error: {e}")
             raise
@@ -41,7 +64,8 @@ def update_user_email(conn, user_id, new_email):
     cursor.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
     print(f"Attempting to update user {user_id} email to {new_email}")
 
-try:
-    update_user_email(user_id=1, new_email='Crawford_Cartwright@hotmail.com')
-except Exception as e:
-    print(f"Update failed: {e}")
\ No newline at end of file
+if __name__ == "__main__":
+    try:
+        update_user_email(user_id=1, new_email='Crawford_Cartwright@hotmail.com')
+    except Exception as e:
+        print(f"Update failed: {e}")
@@ -1,6 +1,7 @@
 import time
 import sqlite3 
 import functools
+from resilience import CircuitBreaker, exponential, fixed, is_transient
 
 def with_db_connection(func):
     @functools.wraps(func)
@@ -17,41 +18,86 @@ def with_db_connection(func):
                 conn.close()
     return wrapper
 
-def retry_on_failure(retries=3, delay=2):
+def retry_on_failure(retries=3, delay=2, backoff=None, deadline=None, retry_if=None,
+                     breaker=None):
     """
     Decorator factory that retries a function 'retries' times
     with a 'delay' between attempts.
+
+    backoff:  resilience policy delay(attempt, previous) replacing the
+              fixed delay, e.g. resilience.exponential()
+    deadline: seconds after the first attempt past which no retry starts
+    retry_if: predicate choosing which exceptions are retried, e.g.
+              resilience.is_transient; by default every Exception
+    breaker:  shared resilience.CircuitBreaker; while it is open calls
+              fail fast with CircuitOpen instead of reaching the database
     """
+    if retries < 1:
+        raise ValueError("retries must be at least 1")
+    backoff = backoff or fixed(delay)
+
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
+            started = time.monotonic()
+            pause = None
             last_exception = None
             for attempt in range(retries):
+                if breaker is not None:
+                    breaker.before_call()
                 try:
-                    return func(*args, **kwargs)
+                    result = func(*args, **kwargs)
                 except Exception as e:
+                    retryable = retry_if is None or retry_if(e)
+                    if breaker is not None:
+                        # Only retryable errors say the database is unhealthy.
+                        if retryable:
+                            breaker.record_failure()
+                        else:
+                            breaker.record_success()
+                    if not retryable:
+                        raise
                     last_exception = e
                     print(f"Attempt {attempt + 1}/{retries} failed: {e}")
-                    if attempt < retries - 1:
-                        print(f"Retrying in {delay} second(s)...")
-                        time.sleep(delay)
-            
+                    if attempt == retries - 1:
+                        break
+                    pause = backoff(attempt, pause)
+                    if deadline is not None and time.monotonic() - started + pause > deadline:
+                        print(f"Deadline of {deadline} second(s) reached.")
+                        raise
+                    print(f"Retrying in {pause:.2f} second(s)...")
+                    time.sleep(pause)
+                    continue
+                except BaseException:
+                    # KeyboardInterrupt/SystemExit: still settle the call so
+                    # a half-open trial does not stay in progress forever.
+                    if breaker is not None:
+                        breaker.record_failure()
+                    raise
+                if breaker is not None:
+                    breaker.record_success()
+                return result
+
             print(f"All {retries} attempts failed.")
-            if last_exception:
-                raise last_exception
+            raise last_exception
         return wrapper
     return decorator
 
 
+users_db_breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+
+
 @with_db_connection
-@retry_on_failure(retries=3, delay=1) 
+@retry_on_failure(retries=3, backoff=exponential(base=0.1, cap=2), deadline=10,
+                  retry_if=is_transient, breaker=users_db_breaker)
 def fetch_users_with_retry(conn):
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM users")
     return cursor.fetchall()
 
-try:
-    users = fetch_users_with_retry()
-    print(f"Successfully fetched users: {users}")
-except Exception as e:
-    print(f"Failed to fetch users after all retries: {e}")
\ No newline at end of file
+if __name__ == "__main__":
+    try:
+        users = fetch_users_with_retry()
+        print(f"Successfully fetched users: {users}")
+    except Exception as e:
+        print(f"Failed to fetch users after all retries: {e}")
@@ -1,6 +1,10 @@
+import os
 import time
 import sqlite3 
 import functools
+from concurrent.futures import ThreadPoolExecutor
+from disk_cache import DiskCache
+from query_cache import QueryCache, database_path, dependency_tags, make_key, tables_read
 
 def with_db_connection(func):
     @functools.wraps(func)
@@ -19,38 +23,67 @@ def with_db_connection(func):
     return wrapper
 
 
-query_cache = {}
+# Set QUERY_CACHE_PATH to share cached results between processes and restarts.
+disk_cache = DiskCache(os.environ["QUERY_CACHE_PATH"]) if os.getenv("QUERY_CACHE_PATH") else None
+query_cache = QueryCache(max_entries=256, max_bytes=16 * 1024 * 1024, ttl=300, stale_ttl=60,
+                         store=disk_cache)
+
+
+def _on_own_connection(func, database, args, kwargs):
+    """Re-run func on a fresh connection, for refreshing from another thread."""
+    def refresh():
+        conn = sqlite3.connect(database)
+        try:
+            if args:
+                return func(conn, *args[1:], **kwargs)
+            return func(**dict(kwargs, conn=conn))
+        finally:
+            conn.close()
+    return refresh
+
 
 def cache_query(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
+        conn = args[0] if args else kwargs.get('conn')
         query = kwargs.get('query')
-        
+        params = kwargs.get('params')
+
         if query is None:
             if len(args) > 1:
                 query = args[1]
             else:
                 print("CACHE: Could not determine query string, skipping cache.")
                 return func(*args, **kwargs)
+        if params is None and len(args) > 2:
+            params = args[2]
 
-        if query in query_cache:
+        database = database_path(conn)
+        key = make_key(database, query, params)
+        tags = dependency_tags(database, tables_read(query))
+        executed = False
+
+        def load():
+            nonlocal executed
+            executed = True
+            print(f"CACHE: Executing and caching new query: {query}")
+            return func(*args, **kwargs)
+
+        # In-memory databases cannot be reopened, so they refresh inline.
+        refresh = _on_own_connection(func, database, args, kwargs) if database else None
+        result = query_cache.get_or_load(key, load, tags=tags, refresh=refresh)
+        if not executed:
             print(f"CACHE: Returning cached result for: {query}")
-            return query_cache[query]
-        
-        print(f"CACHE: Executing and caching new query: {query}")
-        result = func(*args, **kwargs)
-        
-        query_cache[query] = result
         return result
     return wrapper
 
 
 @with_db_connection
 @cache_query
-def fetch_users_with_cache(conn, query):
+def fetch_users_with_cache(conn, query, params=()):
 
     cursor = conn.cursor()
-    cursor.execute(query)
+    cursor.execute(query, params)
     time.sleep(1) 
     return cursor.fetchall()
 
@@ -63,4 +96,16 @@ print("\n--- Second Call ---")
 start_time = time.time()
 users_again = fetch_users_with_cache(query="SELECT * FROM users")
 print(f"Time taken: {time.time() - start_time:.2f}s")
-print(f"\nResults are identical: {users == users_again}")
\ No newline at end of file
+print(f"\nResults are identical: {users == users_again}")
+
+print("\n--- Concurrent Calls ---")
+start_time = time.time()
+with ThreadPoolExecutor(max_workers=5) as executor:
+    results = list(executor.map(
+        lambda _: fetch_users_with_cache(query="SELECT * FROM users WHERE id > ?", params=(0,)),
+        range(5)
+    ))
+print(f"Time taken: {time.time() - start_time:.2f}s")
+print(f"Cache stats: {query_cache.stats()}")
+if disk_cache is not None:
+    print(f"Disk cache stats: {disk_cache.stats()}")
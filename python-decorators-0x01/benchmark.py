@@ -0,0 +1,133 @@
+"""
+Benchmarks for the decorator toolkit, run against users.db.
+Run with: python3 benchmark.py <name> [args...]
+"""
+import contextlib
+import io
+import logging
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from group_commit import GroupCommit
+from instrumentation import QueryRecorder
+from sqlite_pool import DEFAULT_PRAGMAS, ThreadLocalPool, get_pool
+from statements import batched, execute, in_clause
+
+transactional_module = __import__('2-transactional')
+with_db_connection = transactional_module.with_db_connection
+transactional = transactional_module.transactional
+
+
+def _calls_per_second(func, calls, threads):
+    per_thread = calls // threads
+
+    def run(_):
+        for user_id in range(1, per_thread + 1):
+            func(user_id)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(run, range(threads)))
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def _lookup(conn, user_id):
+    return conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
+
+
+def _lookup_many(conn, user_ids):
+    marks, params = in_clause(user_ids)
+    rows = execute(conn, f"SELECT * FROM users WHERE id IN ({marks})", params)
+    return {row[0]: row for row in rows}
+
+
+def bench_connections(calls=20000, threads=1):
+    """Point lookups per second: sqlite3.connect per call vs the thread-local pool."""
+    per_call = with_db_connection(_lookup)
+    pooled = with_db_connection(_lookup, pool=get_pool('users.db'))
+    print(f"{'mode':>10} {'calls/s':>12}")
+    for name, func in (("connect", per_call), ("pooled", pooled)):
+        print(f"{name:>10} {_calls_per_second(func, calls, threads):>12,.0f}")
+
+
+def bench_batched(calls=20000, threads=16, window_us=500):
+    """Concurrent point lookups per second: one query per call vs @batched."""
+    pool = get_pool('users.db')
+    single = with_db_connection(_lookup, pool=pool)
+    coalesced = batched(window=window_us / 1e6)(with_db_connection(_lookup_many, pool=pool))
+    print(f"{'mode':>10} {'calls/s':>12}")
+    print(f"{'single':>10} {_calls_per_second(single, calls, threads):>12,.0f}")
+    print(f"{'batched':>10} {_calls_per_second(coalesced, calls, threads):>12,.0f}")
+
+
+def _insert(conn, user_id):
+    conn.execute("INSERT INTO bench_writes (user_id) VALUES (?)", (user_id,))
+
+
+def bench_group_commit(calls=2000, threads=16, synchronous=2):
+    """
+    Concurrent single-row writes per second: commit per call vs GroupCommit.
+    synchronous is the PRAGMA level (2 = FULL, fsync on every commit).
+    """
+    setup = sqlite3.connect('users.db')
+    setup.execute("CREATE TABLE IF NOT EXISTS bench_writes (id INTEGER PRIMARY KEY, user_id INTEGER)")
+    setup.commit()
+    pool = ThreadLocalPool('users.db', dict(DEFAULT_PRAGMAS, synchronous=synchronous))
+    per_call = with_db_connection(transactional(_insert), pool=pool)
+    group = GroupCommit()
+    grouped = with_db_connection(transactional(_insert, group=group), pool=pool)
+    print(f"{'mode':>10} {'writes/s':>12}")
+    try:
+        # transactional prints a line per commit; keep it out of the table.
+        with contextlib.redirect_stdout(io.StringIO()):
+            rates = [_calls_per_second(func, calls, threads) for func in (per_call, grouped)]
+        print(f"{'per call':>10} {rates[0]:>12,.0f}")
+        print(f"{'grouped':>10} {rates[1]:>12,.0f}")
+        print(f"{group.groups} group commits for {group.calls} writes")
+    finally:
+        pool.close()
+        setup.execute("DROP TABLE bench_writes")
+        setup.close()
+
+
+def _noop(query, params=()):
+    return []
+
+
+def bench_instrumentation(calls=200000):
+    """Per-call overhead of QueryRecorder at several sample rates, in microseconds."""
+    sink = logging.getLogger("queries.benchmark")
+    sink.addHandler(logging.NullHandler())
+    sink.propagate = False
+    query = "SELECT * FROM users WHERE id = 42 AND email = 'a@example.com'"
+
+    def per_call(func):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func(query, (1,))
+        return (time.perf_counter() - start) / calls * 1e6
+
+    baseline = per_call(_noop)
+    print(f"{'sample':>8} {'overhead us':>12}")
+    for rate in (1.0, 0.1, 0.01):
+        recorder = QueryRecorder(interval=0.1, sample_rate=rate, logger=sink)
+        overhead = per_call(recorder.instrument(_noop)) - baseline
+        recorder.close()
+        print(f"{rate:>8} {overhead:>12.2f}")
+
+
+BENCHMARKS = {
+    "connections": bench_connections,
+    "batched": bench_batched,
+    "group_commit": bench_group_commit,
+    "instrumentation": bench_instrumentation,
+}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print(f"Usage: {sys.argv[0]} <{'|'.join(BENCHMARKS)}> [args...]")
+        sys.exit(1)
+    BENCHMARKS[sys.argv[1]](*(int(arg) for arg in sys.argv[2:]))
@@ -0,0 +1,238 @@
+"""
+On-disk second tier for QueryCache, kept in a local SQLite file.
+
+    query_cache = QueryCache(store=DiskCache("/var/tmp/query_cache.db"))
+
+Every worker process on the host opens the same file, so a result cached
+by one worker survives restarts and serves the others after their
+in-memory tier misses. Rows are serialized with marshal (falling back to
+pickle for types marshal cannot handle) and zlib-compressed when large.
+Entries carry the same (database, table) tags as the memory tier, and
+invalidating a table deletes its entries from the file as well.
+
+Invalidation also bumps per-table counters in the file. set() is given
+the counters read before the query ran and drops the value if another
+process invalidated one of its tables in between, the cross-process
+counterpart of query_cache.snapshot().
+"""
+import hashlib
+import marshal
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+
+from query_cache import ANY_TABLE
+
+_MARSHAL = 0
+_PICKLE = 1
+_ZLIB = 2
+_COMPRESS_OVER = 1024
+# Counter bumped by every invalidation of a database, which entries
+# with unknown reads (tagged ANY_TABLE) depend on.
+_ANY_WRITE = ""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key BLOB PRIMARY KEY,
+    value BLOB NOT NULL,
+    format INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS entry_tags (
+    database TEXT NOT NULL,
+    tbl TEXT NOT NULL,
+    key BLOB NOT NULL REFERENCES entries(key) ON DELETE CASCADE,
+    PRIMARY KEY (database, tbl, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS tag_versions (
+    database TEXT NOT NULL,
+    tbl TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (database, tbl)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entry_tags_key ON entry_tags(key);
+CREATE INDEX IF NOT EXISTS entries_expires_at ON entries(expires_at);
+"""
+
+
+def _digest(key):
+    return hashlib.blake2b(repr(key).encode(), digest_size=16).digest()
+
+
+def dumps(value):
+    """Serialize a result to (bytes, format)."""
+    try:
+        data, fmt = marshal.dumps(value), _MARSHAL
+    except ValueError:
+        data, fmt = pickle.dumps(value, pickle.HIGHEST_PROTOCOL), _PICKLE
+    if len(data) > _COMPRESS_OVER:
+        compressed = zlib.compress(data, 1)
+        if len(compressed) < len(data):
+            data, fmt = compressed, fmt | _ZLIB
+    return data, fmt
+
+
+def loads(data, fmt):
+    if fmt & _ZLIB:
+        data = zlib.decompress(data)
+    if fmt & _PICKLE:
+        return pickle.loads(data)
+    return marshal.loads(data)
+
+
+class DiskCache:
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, prune_every=100):
+        """
+        path:        SQLite file shared by all processes using the cache
+        max_bytes:   serialized bytes kept before the soonest-expiring
+                     entries are pruned
+        prune_every: sets between pruning passes
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.prune_every = prune_every
+        self._lock = threading.Lock()
+        self._sets = 0
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, key):
+        """Return (value, seconds left or None), or None on a miss."""
+        digest = _digest(key)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, format, expires_at FROM entries WHERE key = ?", (digest,)
+            ).fetchone()
+            now = time.time()
+            if row is not None and (row[2] is None or row[2] > now):
+                try:
+                    value = loads(row[0], row[1])
+                except Exception:
+                    # Written by an incompatible Python; treat as a miss.
+                    value = row = None
+            else:
+                row = None
+            if row is None:
+                self.misses += 1
+                self._conn.execute(
+                    "DELETE FROM entries WHERE key = ? AND expires_at <= ?", (digest, now)
+                )
+                return None
+            self.hits += 1
+            return value, (row[2] - now if row[2] is not None else None)
+
+    def _read_versions(self, tags):
+        watched = set()
+        for database, table in tags:
+            watched.add((database, table))
+            watched.add((database, ANY_TABLE))
+            if table == ANY_TABLE:
+                watched.add((database, _ANY_WRITE))
+        versions = {}
+        for database, table in watched:
+            row = self._conn.execute(
+                "SELECT version FROM tag_versions WHERE database = ? AND tbl = ?",
+                (database, table)
+            ).fetchone()
+            versions[(database, table)] = row[0] if row else 0
+        return versions
+
+    def versions(self, tags):
+        """Current invalidation counters for `tags`, to pass to set()."""
+        with self._lock:
+            return self._read_versions(tags)
+
+    def set(self, key, value, ttl=None, tags=frozenset(), versions=None):
+        """
+        Store `value`, unless `versions` (from versions() before the query
+        ran) no longer match because one of `tags` was invalidated since.
+        """
+        data, fmt = dumps(value)
+        digest = _digest(key)
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN IMMEDIATE")
+                if versions is not None and versions != self._read_versions(tags):
+                    return False
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (digest,))
+                self._conn.execute(
+                    "INSERT INTO entries (key, value, format, size, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (digest, data, fmt, len(data), expires_at)
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO entry_tags (database, tbl, key) VALUES (?, ?, ?)",
+                    [(database, table, digest) for database, table in tags]
+                )
+            self._sets += 1
+            if self._sets % self.prune_every == 0:
+                self._prune()
+        return True
+
+    def _prune(self):
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+            (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+            if total <= self.max_bytes:
+                return
+            # Drop the entries closest to expiry until under budget.
+            self._conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                "  SELECT key FROM ("
+                "    SELECT key, size, SUM(size) OVER ("
+                "      ORDER BY expires_at IS NULL, expires_at, key) AS running"
+                "    FROM entries"
+                "  ) WHERE running - size < ?"
+                ")",
+                (total - self.max_bytes,)
+            )
+
+    def invalidate_tags(self, database, tables):
+        """Delete entries depending on `tables` of `database` (None = all)."""
+        bumped = [ANY_TABLE] if tables is None else list(tables)
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "INSERT INTO tag_versions (database, tbl, version) VALUES (?, ?, 1) "
+                "ON CONFLICT (database, tbl) DO UPDATE SET version = version + 1",
+                [(database, table) for table in bumped + [_ANY_WRITE]]
+            )
+            if tables is None:
+                cursor = self._conn.execute(
+                    "DELETE FROM entries WHERE key IN "
+                    "(SELECT key FROM entry_tags WHERE database = ?)", (database,)
+                )
+            else:
+                tables = list(tables) + [ANY_TABLE]
+                marks = ", ".join("?" * len(tables))
+                cursor = self._conn.execute(
+                    "DELETE FROM entries WHERE key IN (SELECT key FROM entry_tags "
+                    f"WHERE database = ? AND tbl IN ({marks}))", (database, *tables)
+                )
+            return cursor.rowcount
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            return {"entries": entries, "bytes": size, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Helpers shared by the unit tests.
+"""
+import time
+
+
+class FakeClock:
+    """Manually advanced replacement for time.monotonic."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def wait_for(condition, timeout=2.0):
+    """Poll `condition` until it is true or `timeout` runs out."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.001)
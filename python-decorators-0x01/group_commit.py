@@ -0,0 +1,140 @@
+"""
+Group commit for the transactional decorator.
+
+    writes = GroupCommit(max_batch=32)
+
+    @with_db_connection(pool=get_pool('users.db'))
+    @transactional(group=writes)
+    def update_user_email(conn, user_id, new_email):
+        ...
+
+Groups commit one at a time. Calls arriving while a group is committing
+(up to `max_batch` of them) join the next group, which runs them one
+after another inside a single transaction on its first caller's
+connection, so the whole group pays for one commit. Group size therefore
+grows with load without adding latency to a lone caller; `window` can
+additionally hold each group open for a fixed time.
+
+Calls only share a group with calls on the same database file (an
+in-memory database only with calls on the same connection), so every
+write lands in the database its caller passed in.
+
+Each call runs under its own SAVEPOINT: a call that raises has only its
+own writes rolled back and gets its own exception, while the others
+still commit. If the commit itself fails, or a call raises a
+BaseException such as KeyboardInterrupt, the whole group is rolled back
+and every call that had not failed on its own gets that error.
+"""
+import threading
+
+from query_cache import WriteTracker, database_path
+
+
+class _Call:
+    __slots__ = ("func", "args", "kwargs", "result", "error")
+
+    def __init__(self, func, args, kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.result = None
+        self.error = None
+
+
+class _Group:
+    __slots__ = ("calls", "full", "done")
+
+    def __init__(self):
+        self.calls = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+def _execute(conn, sql):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql)
+    finally:
+        cursor.close()
+
+
+def _database(conn):
+    # In-memory databases are private to their connection.
+    return database_path(conn) or id(conn)
+
+
+class GroupCommit:
+    def __init__(self, max_batch=32, window=0.0):
+        """
+        max_batch: most calls folded into one transaction
+        window:    extra seconds the first caller waits for others to join
+        """
+        self.max_batch = max_batch
+        self.window = window
+        self._lock = threading.Lock()
+        self._commit_lock = threading.Lock()
+        # Group still accepting calls, per database (see _database()).
+        self._pending = {}
+        self.groups = 0
+        self.calls = 0
+
+    def run(self, func, conn, args=(), kwargs=None):
+        """Run func(conn, *args, **kwargs) as part of the next group commit."""
+        call = _Call(func, args, kwargs or {})
+        database = _database(conn)
+        with self._lock:
+            group = self._pending.get(database)
+            leader = group is None
+            if leader:
+                group = self._pending[database] = _Group()
+            group.calls.append(call)
+            if len(group.calls) >= self.max_batch:
+                del self._pending[database]
+                group.full.set()
+        if leader:
+            if self.window:
+                group.full.wait(self.window)
+            try:
+                # The group keeps filling while the previous one commits.
+                with self._commit_lock:
+                    with self._lock:
+                        if self._pending.get(database) is group:
+                            del self._pending[database]
+                        self.groups += 1
+                        self.calls += len(group.calls)
+                    self._commit(conn, group.calls)
+            finally:
+                group.done.set()
+        else:
+            group.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _commit(self, conn, calls):
+        writes = WriteTracker(conn)
+        try:
+            if not conn.in_transaction:
+                _execute(conn, "BEGIN")
+            for i, call in enumerate(calls):
+                savepoint = f"group_commit_{i}"
+                _execute(conn, f"SAVEPOINT {savepoint}")
+                try:
+                    call.result = call.func(conn, *call.args, **call.kwargs)
+                except Exception as e:
+                    call.error = e
+                    _execute(conn, f"ROLLBACK TO SAVEPOINT {savepoint}")
+                _execute(conn, f"RELEASE SAVEPOINT {savepoint}")
+            conn.commit()
+        except BaseException as e:
+            # Also reached on KeyboardInterrupt/SystemExit from a call: the
+            # whole group is rolled back and the leader re-raises.
+            writes.stop()
+            conn.rollback()
+            for call in calls:
+                if call.error is None:
+                    call.error = e
+            print(f"Group transaction of {len(calls)} call(s) rolled back due to error: {e!r}")
+            raise
+        writes.publish()
+        print(f"Group transaction of {len(calls)} call(s) committed.")
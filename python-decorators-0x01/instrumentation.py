@@ -0,0 +1,164 @@
+"""
+Low-overhead query instrumentation.
+
+    recorder = QueryRecorder(sample_rate=0.1)
+
+    @recorder.instrument
+    def fetch_all_users(query):
+        ...
+
+Each sampled call appends one tuple to a bounded deque: the query
+fingerprint (literals replaced by ?, whitespace collapsed), the number
+of bound parameters, wall time, rows returned, the caller's location and
+the exception type if it raised. deque.append is atomic, so recording
+takes no lock. A daemon thread drains the buffer every `interval`
+seconds into a logging.Logger, keeping formatting and I/O off the query
+path. When the buffer is full the oldest events are dropped and counted.
+"""
+import atexit
+import functools
+import logging
+import random
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import deque
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+_recorders = weakref.WeakSet()
+
+
+@functools.lru_cache(maxsize=4096)
+def fingerprint(query):
+    """Normalize `query` so calls differing only in literals group together."""
+    text = _LITERALS.sub("?", query)
+    text = _IN_LIST.sub("(?)", text)
+    return _SPACE.sub(" ", text).strip()
+
+
+def _find_query(args, kwargs):
+    """Return (query, params) from a call like func([conn,] query, params)."""
+    query = kwargs.get("query")
+    params = kwargs.get("params")
+    if query is None:
+        for i, arg in enumerate(args):
+            if isinstance(arg, str):
+                query = arg
+                if params is None and i + 1 < len(args):
+                    params = args[i + 1]
+                break
+    return query, params
+
+
+def _row_count(result):
+    if isinstance(result, list):
+        return len(result)
+    return 0 if result is None else 1
+
+
+class QueryRecorder:
+    def __init__(self, capacity=65536, interval=1.0, sample_rate=1.0, logger=None):
+        """
+        capacity:    events buffered before the oldest are dropped
+        interval:    seconds between flushes to the logger
+        sample_rate: fraction of calls recorded (0.0 - 1.0)
+        logger:      logging.Logger receiving one INFO record per event,
+                     the "queries" logger by default
+        """
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.logger = logger or logging.getLogger("queries")
+        self.events = deque(maxlen=capacity)
+        self.recorded = 0
+        self.dropped = 0
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="query-flush", daemon=True)
+        self._thread.start()
+        _recorders.add(self)
+
+    def instrument(self, func):
+        events = self.events
+        capacity = events.maxlen
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                return func(*args, **kwargs)
+            error = None
+            start = time.perf_counter_ns()
+            try:
+                result = func(*args, **kwargs)
+                return result
+            except BaseException as e:
+                error = type(e).__name__
+                result = None
+                raise
+            finally:
+                elapsed = time.perf_counter_ns() - start
+                caller = sys._getframe(1)
+                query, params = _find_query(args, kwargs)
+                if len(events) == capacity:
+                    self.dropped += 1
+                events.append((
+                    time.time(),
+                    fingerprint(query) if query is not None else None,
+                    len(params) if params is not None else 0,
+                    elapsed,
+                    _row_count(result),
+                    caller.f_code.co_filename,
+                    caller.f_lineno,
+                    caller.f_code.co_name,
+                    error,
+                ))
+        return wrapper
+
+    def flush(self):
+        """Write every buffered event to the logger."""
+        with self._flush_lock:
+            events = self.events
+            while events:
+                try:
+                    (timestamp, query, params, elapsed, rows,
+                     filename, lineno, function, error) = events.popleft()
+                except IndexError:
+                    break
+                self.recorded += 1
+                self.logger.info(
+                    "%.3fms rows=%d params=%d caller=%s:%d(%s)%s %s",
+                    elapsed / 1e6, rows, params, filename, lineno, function,
+                    f" error={error}" if error else "", query,
+                    extra={
+                        "query_fingerprint": query,
+                        "query_params": params,
+                        "query_ms": elapsed / 1e6,
+                        "query_rows": rows,
+                        "query_caller": f"{filename}:{lineno}",
+                        "query_error": error,
+                        "query_time": timestamp,
+                    },
+                )
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.flush()
+
+    def close(self):
+        self._stopped.set()
+        self._thread.join()
+        self.flush()
+
+    def stats(self):
+        return {"buffered": len(self.events), "recorded": self.recorded,
+                "dropped": self.dropped}
+
+
+@atexit.register
+def _flush_all():
+    for recorder in list(_recorders):
+        recorder.flush()
@@ -0,0 +1,449 @@
+"""
+Bounded LRU/TTL cache for query results.
+
+Entries are keyed on the database file, the SQL text and its bound
+parameters. The cache is limited by entry count and by an estimate of
+the memory held by cached rows, evicting least recently used entries
+first, and every entry expires after its TTL.
+
+Entries are also tagged with the tables their SELECT reads. When a
+transaction that wrote to some tables commits (see WriteTracker), only
+the entries depending on those tables are evicted, in every cache.
+
+get_or_load() coalesces concurrent misses on a key into one load, and
+with stale_ttl set keeps serving an expired entry for that long while a
+single caller refreshes it, so hot keys do not stampede the database.
+An optional second-tier store (see disk_cache.DiskCache) is consulted
+before running a load, and filled after it.
+"""
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+ANY_TABLE = "*"
+
+_NAME = r"[`\"\[]?([\w.]+)[`\"\]]?"
+_FROM = re.compile(
+    r"\bFROM\s+(.*?)(?=\b(?:WHERE|GROUP|ORDER|LIMIT|HAVING|UNION|EXCEPT|INTERSECT|WINDOW|"
+    r"JOIN|INNER|LEFT|RIGHT|FULL|CROSS|NATURAL|ON|USING)\b|[();]|$)",
+    re.IGNORECASE | re.DOTALL,
+)
+_JOIN = re.compile(r"\bJOIN\s+" + _NAME, re.IGNORECASE)
+_WRITE = re.compile(
+    r"^\s*(?:"
+    r"(?:INSERT|REPLACE)\b.*?\bINTO\s+" + _NAME +
+    r"|UPDATE\s+(?:OR\s+\w+\s+)?" + _NAME +
+    r"|DELETE\s+FROM\s+" + _NAME +
+    r"|(?:CREATE|DROP|ALTER)\s+TABLE\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?" + _NAME +
+    r")",
+    re.IGNORECASE | re.DOTALL,
+)
+_NON_WRITES = re.compile(
+    r"^\s*(?:--|(?:SELECT|BEGIN|COMMIT|END|ROLLBACK|SAVEPOINT|RELEASE|PRAGMA|EXPLAIN)\b)",
+    re.IGNORECASE,
+)
+
+
+def _sizeof(value):
+    """Rough deep size of a query result (lists/tuples of scalars)."""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        size += sum(_sizeof(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(_sizeof(k) + _sizeof(v) for k, v in value.items())
+    return size
+
+
+def _freeze(params):
+    if isinstance(params, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in params.items()))
+    if isinstance(params, (list, tuple)):
+        return tuple(_freeze(p) for p in params)
+    return params
+
+
+def _table(name):
+    return name.rsplit(".", 1)[-1].lower()
+
+
+def tables_read(sql):
+    """Tables a SELECT reads, or None if they cannot be determined."""
+    tables = set()
+    for match in _FROM.finditer(sql):
+        for item in match.group(1).split(","):
+            item = item.strip()
+            if item:
+                tables.add(_table(item.split()[0].strip('`"[]')))
+    tables.update(_table(name) for name in _JOIN.findall(sql))
+    return tables or None
+
+
+def tables_written(sql):
+    """
+    Tables a statement modifies: an empty set for reads and transaction
+    control, None when it may write but the target cannot be parsed.
+    """
+    match = _WRITE.match(sql)
+    if match:
+        return {_table(next(name for name in match.groups() if name))}
+    if _NON_WRITES.match(sql):
+        return set()
+    return None
+
+
+# database_path() per connection. Plain sqlite3.Connection objects
+# cannot be weakly referenced; sqlite_pool's connections can.
+_paths = weakref.WeakKeyDictionary()
+
+
+def database_path(conn):
+    """File behind the connection's main database ("" for in-memory)."""
+    try:
+        return _paths[conn]
+    except (KeyError, TypeError):
+        pass
+    path = ""
+    for _, name, file in conn.execute("PRAGMA database_list"):
+        if name == "main":
+            path = file
+            break
+    try:
+        _paths[conn] = path
+    except TypeError:
+        pass
+    return path
+
+
+def make_key(database, query, params=None):
+    return (database, query, _freeze(params) if params is not None else ())
+
+
+_DEFAULT = object()
+
+# Every QueryCache registers here so a commit can invalidate all of them.
+_caches = weakref.WeakSet()
+# Bumped for (database, table) on every invalidation; a result is only
+# stored if none of its tables changed while its query was running.
+_versions = {}
+_invalidation_lock = threading.RLock()
+
+
+def dependency_tags(database, tables):
+    """Tags for an entry reading `tables` (None = unknown, depends on all)."""
+    if tables is None:
+        return frozenset({(database, ANY_TABLE)})
+    return frozenset((database, table) for table in tables)
+
+
+def snapshot(tags):
+    """Current versions of `tags`, to pass to QueryCache.set()."""
+    watched = set(tags)
+    for database, table in tags:
+        # Unknown writes bump (database, ANY_TABLE); every write bumps
+        # (database, None), which entries with unknown reads depend on.
+        watched.add((database, ANY_TABLE))
+        if table == ANY_TABLE:
+            watched.add((database, None))
+    with _invalidation_lock:
+        return {tag: _versions.get(tag, 0) for tag in watched}
+
+
+def invalidate_tables(database, tables):
+    """
+    Evict cached results that read any of `tables` in `database`, in
+    every cache. tables=None (an unparseable write) evicts everything
+    cached for that database.
+    """
+    with _invalidation_lock:
+        if tables is None:
+            bumped = {(database, ANY_TABLE)}
+        else:
+            bumped = {(database, table) for table in tables}
+        bumped.add((database, None))
+        for tag in bumped:
+            _versions[tag] = _versions.get(tag, 0) + 1
+        for cache in list(_caches):
+            cache.invalidate_tags(database, tables)
+
+
+class WriteTracker:
+    """
+    Record the tables written on a sqlite3 connection (through its trace
+    callback) and invalidate dependent cache entries on publish().
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.tables = set()
+        self.unknown = False
+        conn.set_trace_callback(self._trace)
+
+    def _trace(self, sql):
+        tables = tables_written(sql)
+        if tables is None:
+            self.unknown = True
+        else:
+            self.tables.update(tables)
+
+    def stop(self):
+        self.conn.set_trace_callback(None)
+
+    def publish(self):
+        """Call after a successful commit."""
+        self.stop()
+        if self.unknown:
+            invalidate_tables(database_path(self.conn), None)
+        elif self.tables:
+            invalidate_tables(database_path(self.conn), self.tables)
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at", "stale_until", "tags")
+
+    def __init__(self, value, size, expires_at, stale_until, tags):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.tags = tags
+
+
+class _Flight:
+    """A load in progress; callers missing on the same key wait for it."""
+    __slots__ = ("tags", "done", "value", "error")
+
+    def __init__(self, tags):
+        self.tags = tags
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+    def result(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class QueryCache:
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl=300.0,
+                 stale_ttl=0.0, store=None, clock=time.monotonic):
+        """
+        max_entries: maximum number of cached results
+        max_bytes:   maximum estimated memory held by cached results
+        ttl:         default seconds an entry stays fresh (None = forever)
+        stale_ttl:   seconds past ttl that get_or_load() may still serve an
+                     entry while it is refreshed
+        store:       optional second tier shared between processes, with
+                     get(key), versions(tags), set(key, value, ttl, tags,
+                     versions) and invalidate_tags(database, tables)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.store = store
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._by_tag = {}
+        self._flights = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.coalesced = 0
+        self.stale_hits = 0
+        self.refresh_errors = 0
+        _caches.add(self)
+
+    def _lookup(self, key):
+        """Return (entry, stale) and count the hit or miss; entry is None on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, False
+        now = self.clock()
+        if entry.expires_at is None or entry.expires_at > now:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry, False
+        if entry.stale_until <= now:
+            self._remove(key)
+            self.expirations += 1
+        self.misses += 1
+        return (entry, True) if key in self._entries else (None, False)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry, stale = self._lookup(key)
+            if entry is None or stale:
+                return default
+            return entry.value
+
+    def get_or_load(self, key, load, tags=frozenset(), refresh=None):
+        """
+        Return the cached value for `key`, calling load() to fill a miss.
+
+        Concurrent misses on the same key wait for one load instead of
+        each running the query. A stale entry is returned immediately; one
+        caller refreshes it by running refresh() on a background thread,
+        or load() itself when no refresh is given (refresh must not depend
+        on the calling thread's connection).
+        """
+        leader = False
+        with self._lock:
+            entry, stale = self._lookup(key)
+            if entry is not None and not stale:
+                return entry.value
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight(tags)
+                leader = True
+            elif entry is None:
+                self.coalesced += 1
+            if entry is not None:
+                self.stale_hits += 1
+        if entry is None:
+            return self._load(key, load, flight) if leader else flight.result()
+        if leader:
+            if refresh is None:
+                self._load(key, load, flight)
+            else:
+                threading.Thread(
+                    target=self._refresh, args=(key, refresh, flight), daemon=True
+                ).start()
+        return entry.value
+
+    def _load(self, key, load, flight):
+        try:
+            versions = snapshot(flight.tags)
+            if self.store is not None:
+                # Other processes invalidate the store, not our snapshot.
+                store_versions = self.store.versions(flight.tags)
+                found = self.store.get(key)
+                if found is not None:
+                    flight.value, ttl = found
+                    self.set(key, flight.value, ttl=ttl, tags=flight.tags, versions=versions)
+                    return flight.value
+            flight.value = load()
+            stored = self.set(key, flight.value, tags=flight.tags, versions=versions)
+            if stored and self.store is not None:
+                self.store.set(key, flight.value, ttl=self.ttl, tags=flight.tags,
+                               versions=store_versions)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+    def _refresh(self, key, refresh, flight):
+        try:
+            self._load(key, refresh, flight)
+        except Exception:
+            # The stale entry keeps being served until stale_ttl runs out.
+            with self._lock:
+                self.refresh_errors += 1
+
+    def set(self, key, value, ttl=_DEFAULT, tags=frozenset(), versions=None):
+        """
+        Store `value`. `tags` are the (database, table) pairs it depends
+        on; `versions` is a snapshot() taken before the query ran, and the
+        value is dropped if any of those tables was written since.
+        """
+        ttl = self.ttl if ttl is _DEFAULT else ttl
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return False
+        expires_at = self.clock() + ttl if ttl is not None else None
+        stale_until = expires_at + self.stale_ttl if ttl is not None else None
+        with _invalidation_lock, self._lock:
+            if versions is not None and versions != snapshot(tags):
+                return False
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(value, size, expires_at, stale_until, tags)
+            for tag in tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return True
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+        return entry
+
+    def invalidate_tags(self, database, tables):
+        """Evict entries depending on `tables` of `database` (None = all)."""
+        if self.store is not None:
+            self.store.invalidate_tags(database, tables)
+        with self._lock:
+            if tables is None:
+                tags = [tag for tag in self._by_tag if tag[0] == database]
+            else:
+                tags = [(database, table) for table in tables]
+                tags.append((database, ANY_TABLE))
+            keys = set()
+            for tag in tags:
+                keys.update(self._by_tag.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            # Loads already running may have read the old rows; callers
+            # arriving from now on start a new one instead of joining them.
+            tags = set(tags)
+            for key, flight in list(self._flights.items()):
+                if any(tag in tags or tables is None and tag[0] == database
+                       for tag in flight.tags):
+                    del self._flights[key]
+            return len(keys)
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                return True
+        return False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_tag.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "coalesced": self.coalesced,
+                "stale_hits": self.stale_hits,
+                "refresh_errors": self.refresh_errors,
+            }
@@ -0,0 +1,113 @@
+"""
+Backoff policies, transient-error classification and a circuit breaker
+for retry_on_failure.
+
+A backoff policy is a function delay(attempt, previous) -> seconds, where
+attempt counts from 0 and previous is the last delay (None at first).
+Jittered policies keep workers that failed together from retrying in
+lockstep.
+"""
+import random
+import sqlite3
+import threading
+import time
+
+SQLITE_TRANSIENT_MESSAGES = (
+    "database is locked",
+    "database table is locked",
+    "database is busy",
+    "unable to open database file",
+)
+MYSQL_TRANSIENT_ERRNOS = {
+    1040,  # too many connections
+    1205,  # lock wait timeout exceeded
+    1213,  # deadlock found when trying to get lock
+    2003,  # can't connect to server
+    2006,  # server has gone away
+    2013,  # lost connection during query
+}
+
+
+def fixed(delay):
+    return lambda attempt, previous: delay
+
+
+def exponential(base=0.1, cap=10.0, jitter=True):
+    """base * 2**attempt, capped; with jitter a uniform draw below that ("full jitter")."""
+    def delay(attempt, previous):
+        ceiling = min(cap, base * 2 ** attempt)
+        return random.uniform(0, ceiling) if jitter else ceiling
+    return delay
+
+
+def decorrelated_jitter(base=0.1, cap=10.0):
+    """Uniform between base and three times the previous delay, capped."""
+    def delay(attempt, previous):
+        return min(cap, random.uniform(base, (previous or base) * 3))
+    return delay
+
+
+def is_transient(error):
+    """True for lock, deadlock and connection errors worth retrying."""
+    if isinstance(error, sqlite3.OperationalError):
+        message = str(error).lower()
+        return any(text in message for text in SQLITE_TRANSIENT_MESSAGES)
+    # mysql.connector errors carry the server error code as errno.
+    if type(error).__module__.startswith("mysql"):
+        return getattr(error, "errno", None) in MYSQL_TRANSIENT_ERRNOS
+    return False
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling the database while the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Fails fast after `failure_threshold` consecutive failures. After
+    `reset_timeout` seconds one trial call is let through (half-open): its
+    success closes the circuit, its failure opens it again. Share one
+    instance between every function that talks to the same database.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self.clock() - self._opened_at < self.reset_timeout:
+                return "open"
+            return "half-open"
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self._opened_at + self.reset_timeout - self.clock()
+            if remaining > 0:
+                raise CircuitOpen(f"Circuit open, retry in {remaining:.1f}s")
+            if self._trial_running:
+                raise CircuitOpen("Circuit half-open, trial call in progress")
+            self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = self.clock()
+            self._trial_running = False
@@ -0,0 +1,149 @@
+"""
+Prepared-statement reuse and request coalescing for decorated queries.
+
+execute(conn, sql, params) runs SQL through a per-connection statement
+cache: sqlite3 keeps its own (sized by the cached_statements connect
+option, which sqlite_pool raises), and MySQL connections get one
+server-side prepared cursor per statement. Both only pay off when the
+connection outlives the call, i.e. with a pooled with_db_connection.
+
+batched turns a function that loads many keys at once into one that is
+called with a single key; concurrent callers share one query:
+
+    @batched(max_batch=100, window=0.002)
+    @with_db_connection(pool=get_pool('users.db'))
+    def get_user_by_id_batched(conn, user_ids):
+        marks, params = in_clause(user_ids)
+        rows = execute(conn, f"SELECT * FROM users WHERE id IN ({marks})", params)
+        return {row[0]: row for row in rows}
+
+    get_user_by_id_batched(1)  # -> the row for id 1, or None
+
+Coalescing only pays off where each query has a real round trip, such
+as a MySQL server. Against a local SQLite file one query per call is
+much faster than the hand-off between threads (see benchmark.py batched).
+"""
+import functools
+import sqlite3
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import Mapping
+
+MAX_PREPARED = 64
+
+_prepared = weakref.WeakKeyDictionary()
+_prepared_lock = threading.Lock()
+
+
+def _driver_connection(conn):
+    """
+    The driver connection behind a pool wrapper such as
+    db_pool.PooledConnection, which is a new object on every borrow.
+    """
+    raw = getattr(conn, "raw", None)
+    # mysql.connector connections have a `raw` results flag of their own.
+    return conn if raw is None or isinstance(raw, bool) else raw
+
+
+def execute(conn, sql, params=()):
+    """
+    Execute `sql` with a statement prepared once per connection and
+    return the cursor. Fetch its rows before executing the same SQL
+    again on that connection, since MySQL reuses the cursor.
+    """
+    if isinstance(conn, sqlite3.Connection):
+        return conn.execute(sql, params)
+    conn = _driver_connection(conn)
+    with _prepared_lock:
+        cursors = _prepared.get(conn)
+        if cursors is None:
+            cursors = _prepared[conn] = OrderedDict()
+        cursor = cursors.pop(sql, None)
+        if cursor is None:
+            cursor = conn.cursor(prepared=True)
+        cursors[sql] = cursor
+        if len(cursors) > MAX_PREPARED:
+            _, oldest = cursors.popitem(last=False)
+            oldest.close()
+    cursor.execute(sql, params)
+    return cursor
+
+
+def in_clause(values):
+    """
+    Placeholders and parameters for `IN (...)` over `values`, padded to
+    a power of two so a handful of statement texts cover every size.
+    """
+    values = list(values)
+    if not values:
+        raise ValueError("in_clause() needs at least one value")
+    size = 1
+    while size < len(values):
+        size *= 2
+    params = values + values[-1:] * (size - len(values))
+    return ", ".join("?" * size), params
+
+
+class _Batch:
+    __slots__ = ("keys", "full", "done", "results", "error")
+
+    def __init__(self):
+        self.keys = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+def batched(max_batch=100, window=0.002):
+    """
+    Decorator for func(keys) -> {key: result}. The wrapper takes one key;
+    the first caller waits up to `window` seconds (or until `max_batch`
+    keys have arrived), runs func once for every key collected and hands
+    each caller its result, None if its key is missing. An exception
+    from func (any BaseException), or a TypeError if it returns something
+    other than a mapping, is raised in every caller of that batch.
+    """
+    def decorator(func):
+        lock = threading.Lock()
+        pending = None
+
+        @functools.wraps(func)
+        def wrapper(key):
+            nonlocal pending
+            with lock:
+                batch = pending
+                leader = batch is None
+                if leader:
+                    batch = pending = _Batch()
+                batch.keys.append(key)
+                if len(batch.keys) >= max_batch:
+                    pending = None
+                    batch.full.set()
+            if leader:
+                batch.full.wait(window)
+                with lock:
+                    if pending is batch:
+                        pending = None
+                try:
+                    results = func(list(dict.fromkeys(batch.keys)))
+                    if not isinstance(results, Mapping):
+                        name = getattr(func, "__name__", "func")
+                        raise TypeError(
+                            f"{name}() must return a mapping of key -> result, "
+                            f"not {type(results).__name__}"
+                        )
+                    batch.results = results
+                except BaseException as e:
+                    # Every caller of the batch, leader included, re-raises it.
+                    batch.error = e
+                finally:
+                    batch.done.set()
+            else:
+                batch.done.wait()
+            if batch.error is not None:
+                raise batch.error
+            return batch.results.get(key)
+        return wrapper
+    return decorator
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Unit tests for disk_cache.py.
+"""
+import os
+import tempfile
+import unittest
+from disk_cache import DiskCache
+from query_cache import ANY_TABLE, QueryCache, dependency_tags, invalidate_tables
+
+
+class TestDiskCache(unittest.TestCase):
+    """Test cases for the on-disk tier."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "cache.db")
+        self.cache = self.open()
+
+    def open(self, **kwargs):
+        cache = DiskCache(self.path, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_roundtrip(self):
+        """Test marshal, pickle and compressed values come back equal."""
+        values = [
+            [(1, "Alice", "alice@example.com", 30)],
+            [(i, "x" * 50) for i in range(100)],
+            {"ids": frozenset({1, 2}), "cause": ValueError("pickled")},
+        ]
+        for i, value in enumerate(values):
+            with self.subTest(value=i):
+                self.cache.set(i, value, ttl=60)
+                found, ttl_left = self.cache.get(i)
+                if i == 2:
+                    self.assertEqual(found["ids"], value["ids"])
+                    self.assertEqual(found["cause"].args, ("pickled",))
+                else:
+                    self.assertEqual(found, value)
+                self.assertGreater(ttl_left, 59)
+
+    def test_expired_entry_is_a_miss(self):
+        """Test that an entry past its ttl is not returned."""
+        self.cache.set("k", [1], ttl=-1)
+        self.assertIsNone(self.cache.get("k"))
+        self.cache.set("forever", [1])
+        self.assertEqual(self.cache.get("forever"), ([1], None))
+
+    def test_invalidate_tags(self):
+        """Test that invalidation deletes dependent and unknown-read entries."""
+        self.cache.set("users", 1, tags={("db", "users")})
+        self.cache.set("orders", 2, tags={("db", "orders")})
+        self.cache.set("unknown", 3, tags={("db", ANY_TABLE)})
+        self.assertEqual(self.cache.invalidate_tags("db", {"users"}), 2)
+        self.assertIsNone(self.cache.get("users"))
+        self.assertIsNone(self.cache.get("unknown"))
+        self.assertEqual(self.cache.get("orders"), (2, None))
+        self.cache.invalidate_tags("db", None)
+        self.assertIsNone(self.cache.get("orders"))
+
+    def test_set_dropped_after_write_in_other_process(self):
+        """Test that an invalidation from another handle voids the versions."""
+        other = self.open()
+        for tags in ({("db", "users")}, {("db", ANY_TABLE)}):
+            with self.subTest(tags=tags):
+                versions = self.cache.versions(tags)
+                other.invalidate_tags("db", {"users"})
+                self.assertFalse(self.cache.set("k", 1, tags=tags, versions=versions))
+                self.assertIsNone(self.cache.get("k"))
+                versions = self.cache.versions(tags)
+                self.assertTrue(self.cache.set("k", 1, tags=tags, versions=versions))
+
+    def test_prune_keeps_within_max_bytes(self):
+        """Test that pruning drops the soonest-expiring entries first."""
+        cache = self.open(max_bytes=2000, prune_every=1)
+        for i in range(20):
+            cache.set(i, os.urandom(200), ttl=100 + i)
+        self.assertLessEqual(cache.stats()["bytes"], 2000)
+        self.assertIsNone(cache.get(0))
+        self.assertIsNotNone(cache.get(19))
+
+    def test_shared_between_memory_caches(self):
+        """Test that a second QueryCache loads from the store, not the database."""
+        tags = dependency_tags(self.id(), {"users"})
+        first = QueryCache(store=self.cache)
+        self.assertEqual(first.get_or_load("k", lambda: [1, 2], tags=tags), [1, 2])
+        second = QueryCache(store=self.open())
+        self.assertEqual(second.get_or_load("k", lambda: self.fail("load called"),
+                                            tags=tags), [1, 2])
+        invalidate_tables(self.id(), {"users"})
+        third = QueryCache(store=self.open())
+        self.assertEqual(third.get_or_load("k", lambda: [3], tags=tags), [3])
+
+
+if __name__ == "__main__":
+    unittest.main()
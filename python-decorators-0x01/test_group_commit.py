@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Unit tests for group_commit.py.
+"""
+import contextlib
+import io
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from group_commit import GroupCommit
+
+
+def insert(conn, user_id):
+    conn.execute("INSERT INTO writes (user_id) VALUES (?)", (user_id,))
+    return user_id
+
+
+class TestGroupCommit(unittest.TestCase):
+    """Test cases for GroupCommit.run."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "users.db")
+        self.other_path = os.path.join(directory.name, "other.db")
+        for path in (self.path, self.other_path):
+            conn = sqlite3.connect(path)
+            conn.execute("CREATE TABLE writes (id INTEGER PRIMARY KEY, user_id INTEGER)")
+            conn.commit()
+            conn.close()
+        # GroupCommit prints a line per group.
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+
+    def committed(self, path=None):
+        conn = sqlite3.connect(path or self.path)
+        try:
+            return sorted(row[0] for row in conn.execute("SELECT user_id FROM writes"))
+        finally:
+            conn.close()
+
+    def run_group(self, group, funcs, paths=None):
+        """Run each func(conn, i) from its own thread; return results or errors."""
+        outcomes = [None] * len(funcs)
+        paths = paths or [self.path] * len(funcs)
+
+        def call(i):
+            conn = sqlite3.connect(paths[i], check_same_thread=False)
+            try:
+                outcomes[i] = group.run(funcs[i], conn, (i,))
+            except BaseException as e:
+                outcomes[i] = e
+            finally:
+                conn.close()
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(len(funcs))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_single_call(self):
+        """Test that a lone call commits on its own."""
+        group = GroupCommit()
+        conn = sqlite3.connect(self.path)
+        self.addCleanup(conn.close)
+        self.assertEqual(group.run(insert, conn, (7,)), 7)
+        self.assertEqual(self.committed(), [7])
+        self.assertEqual((group.groups, group.calls), (1, 1))
+
+    def test_concurrent_calls_share_commits(self):
+        """Test that every concurrent write commits, in fewer groups."""
+        group = GroupCommit(max_batch=4, window=0.5)
+        outcomes = self.run_group(group, [insert] * 8)
+        self.assertEqual(outcomes, list(range(8)))
+        self.assertEqual(self.committed(), list(range(8)))
+        self.assertEqual(group.calls, 8)
+        self.assertLess(group.groups, 8)
+
+    def test_failing_call_rolls_back_only_its_writes(self):
+        """Test that an Exception is raised to its caller alone."""
+        def insert_then_fail(conn, user_id):
+            insert(conn, user_id)
+            raise ValueError("bad row %d" % user_id)
+
+        group = GroupCommit(max_batch=3, window=2)
+        outcomes = self.run_group(group, [insert, insert_then_fail, insert])
+        self.assertEqual(group.groups, 1)
+        self.assertEqual(outcomes[0], 0)
+        self.assertIsInstance(outcomes[1], ValueError)
+        self.assertEqual(outcomes[2], 2)
+        self.assertEqual(self.committed(), [0, 2])
+
+    def test_base_exception_rolls_back_group(self):
+        """Test that a KeyboardInterrupt fails every call and commits nothing."""
+        def insert_then_interrupt(conn, user_id):
+            insert(conn, user_id)
+            raise KeyboardInterrupt
+
+        group = GroupCommit(max_batch=3, window=2)
+        outcomes = self.run_group(group, [insert, insert_then_interrupt, insert])
+        self.assertEqual(group.groups, 1)
+        for outcome in outcomes:
+            self.assertIsInstance(outcome, KeyboardInterrupt)
+        self.assertEqual(self.committed(), [])
+
+
+    def test_groups_are_per_database(self):
+        """Test that each write lands in its caller's database."""
+        group = GroupCommit(max_batch=2, window=2)
+        paths = [self.path, self.other_path] * 2
+        outcomes = self.run_group(group, [insert] * 4, paths)
+        self.assertEqual(outcomes, [0, 1, 2, 3])
+        self.assertEqual(self.committed(self.path), [0, 2])
+        self.assertEqual(self.committed(self.other_path), [1, 3])
+        self.assertEqual(group.groups, 2)
+
+    def test_in_memory_databases_are_not_shared(self):
+        """Test that two in-memory connections never share a group."""
+        group = GroupCommit(max_batch=2, window=0.2)
+        connections = [sqlite3.connect(":memory:", check_same_thread=False)
+                       for _ in range(2)]
+        for conn in connections:
+            self.addCleanup(conn.close)
+            conn.execute("CREATE TABLE writes (id INTEGER PRIMARY KEY, user_id INTEGER)")
+        threads = [threading.Thread(target=group.run, args=(insert, conn, (i,)))
+                   for i, conn in enumerate(connections)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for i, conn in enumerate(connections):
+            self.assertEqual(conn.execute("SELECT user_id FROM writes").fetchall(), [(i,)])
+
+
+if __name__ == "__main__":
+    unittest.main()
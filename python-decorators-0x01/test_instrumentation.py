@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Unit tests for instrumentation.py.
+"""
+import logging
+import unittest
+from instrumentation import QueryRecorder, fingerprint
+
+
+def fetch(conn, query, params=None):
+    """Stand-in for a decorated query function."""
+    if "missing" in query:
+        raise LookupError(query)
+    return [(1, "Ada"), (2, "Alan")] if query.startswith("SELECT") else None
+
+
+class TestFingerprint(unittest.TestCase):
+    """Test cases for fingerprint."""
+
+    def test_normalization(self):
+        """Test literals, IN lists and whitespace."""
+        cases = [
+            ("SELECT * FROM users WHERE id = 42", "SELECT * FROM users WHERE id = ?"),
+            ("SELECT * FROM users WHERE name = 'O''Brien'",
+             "SELECT * FROM users WHERE name = ?"),
+            ("SELECT * FROM users WHERE age > 2.5", "SELECT * FROM users WHERE age > ?"),
+            ("SELECT * FROM users WHERE id IN (1, 2, 3)",
+             "SELECT * FROM users WHERE id IN (?)"),
+            ("SELECT * FROM users WHERE id IN (?,?)", "SELECT * FROM users WHERE id IN (?)"),
+            ("  SELECT *\n\tFROM   users  ", "SELECT * FROM users"),
+            ("SELECT * FROM users2", "SELECT * FROM users2"),
+        ]
+        for query, expected in cases:
+            with self.subTest(query=query):
+                self.assertEqual(fingerprint(query), expected)
+
+    def test_same_shape_same_fingerprint(self):
+        """Test that queries differing only in literals group together."""
+        self.assertEqual(fingerprint("SELECT * FROM users WHERE id IN (1, 2)"),
+                         fingerprint("SELECT * FROM users WHERE id IN (7,8,9)"))
+
+
+class TestQueryRecorder(unittest.TestCase):
+    """Test cases for QueryRecorder."""
+
+    def recorder(self, **options):
+        """Return a recorder whose background thread never flushes on its own."""
+        logger = logging.getLogger(f"queries.{self.id()}")
+        recorder = QueryRecorder(interval=3600, logger=logger, **options)
+        self.addCleanup(recorder.close)
+        return recorder
+
+    def test_flush_writes_records_with_extras(self):
+        """Test one INFO record per call, carrying the structured fields."""
+        recorder = self.recorder()
+        instrumented = recorder.instrument(fetch)
+        self.assertEqual(instrumented(None, "SELECT * FROM users WHERE id = ?", (5,)),
+                         [(1, "Ada"), (2, "Alan")])
+        with self.assertLogs(recorder.logger, "INFO") as logs:
+            recorder.flush()
+        [record] = logs.records
+        self.assertEqual(record.query_fingerprint, "SELECT * FROM users WHERE id = ?")
+        self.assertEqual(record.query_params, 1)
+        self.assertEqual(record.query_rows, 2)
+        self.assertIsNone(record.query_error)
+        self.assertGreaterEqual(record.query_ms, 0)
+        self.assertEqual(record.query_caller.rsplit(":", 1)[0], __file__)
+        self.assertEqual(recorder.stats(), {"buffered": 0, "recorded": 1, "dropped": 0})
+
+    def test_keyword_query(self):
+        """Test that query and params are found when passed by keyword."""
+        recorder = self.recorder()
+        recorder.instrument(fetch)(None, query="UPDATE users SET age = 3", params=())
+        with self.assertLogs(recorder.logger, "INFO") as logs:
+            recorder.flush()
+        self.assertEqual(logs.records[0].query_fingerprint, "UPDATE users SET age = ?")
+        self.assertEqual(logs.records[0].query_rows, 0)
+
+    def test_error_recorded_and_reraised(self):
+        """Test that a failing call is recorded with its exception type."""
+        recorder = self.recorder()
+        with self.assertRaises(LookupError):
+            recorder.instrument(fetch)(None, "SELECT * FROM missing")
+        with self.assertLogs(recorder.logger, "INFO") as logs:
+            recorder.flush()
+        self.assertEqual(logs.records[0].query_error, "LookupError")
+        self.assertIn("error=LookupError", logs.output[0])
+
+    def test_sample_rate(self):
+        """Test that sample_rate 0 records nothing and 1 records every call."""
+        for rate, expected in ((0.0, 0), (1.0, 10)):
+            with self.subTest(sample_rate=rate):
+                recorder = self.recorder(sample_rate=rate)
+                instrumented = recorder.instrument(fetch)
+                for i in range(10):
+                    self.assertIsNotNone(instrumented(None, f"SELECT {i}"))
+                self.assertEqual(recorder.stats()["buffered"], expected)
+
+    def test_full_buffer_drops_oldest(self):
+        """Test the bounded buffer and the dropped count."""
+        recorder = self.recorder(capacity=3)
+        instrumented = recorder.instrument(fetch)
+        for table in ("a", "b", "c", "d", "e"):
+            instrumented(None, f"SELECT * FROM {table}")
+        self.assertEqual(recorder.stats(), {"buffered": 3, "recorded": 0, "dropped": 2})
+        with self.assertLogs(recorder.logger, "INFO") as logs:
+            recorder.flush()
+        self.assertEqual([record.query_fingerprint for record in logs.records],
+                         ["SELECT * FROM c", "SELECT * FROM d", "SELECT * FROM e"])
+
+    def test_close_flushes(self):
+        """Test that close() stops the thread and writes what is buffered."""
+        recorder = self.recorder()
+        recorder.instrument(fetch)(None, "SELECT 1")
+        with self.assertLogs(recorder.logger, "INFO") as logs:
+            recorder.close()
+        self.assertEqual(len(logs.records), 1)
+        self.assertFalse(recorder._thread.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
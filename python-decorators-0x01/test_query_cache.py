@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Unit tests for query_cache.py.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from query_cache import (QueryCache, WriteTracker, database_path,
+                         dependency_tags, invalidate_tables, snapshot,
+                         tables_read, tables_written)
+from fixtures import FakeClock, wait_for
+from sqlite_pool import ThreadLocalPool
+
+
+class TestQueryCacheBounds(unittest.TestCase):
+    """Test cases for the entry count and byte limits."""
+
+    def test_evicts_least_recently_used(self):
+        """Test that the entry read last survives an eviction."""
+        cache = QueryCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_byte_limit(self):
+        """Test that the estimated size never exceeds max_bytes."""
+        row = [(i, "user%d@example.com" % i) for i in range(10)]
+        cache = QueryCache(max_bytes=3000)
+        for key in range(20):
+            cache.set(key, list(row))
+            self.assertLessEqual(cache.stats()["bytes"], 3000)
+        self.assertGreater(cache.stats()["evictions"], 0)
+        self.assertEqual(cache.get(19), row)
+
+    def test_rejects_value_larger_than_limit(self):
+        """Test that a single oversized value is not stored."""
+        cache = QueryCache(max_bytes=100)
+        self.assertFalse(cache.set("big", ["x" * 1000]))
+        self.assertEqual(len(cache), 0)
+
+    def test_replacing_a_key_updates_bytes(self):
+        """Test that set() on an existing key does not count it twice."""
+        cache = QueryCache()
+        cache.set("k", ["x" * 100])
+        size = cache.stats()["bytes"]
+        cache.set("k", ["x" * 100])
+        self.assertEqual(cache.stats()["bytes"], size)
+        self.assertEqual(len(cache), 1)
+
+
+class TestQueryCacheExpiry(unittest.TestCase):
+    """Test cases for ttl."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = QueryCache(ttl=10, clock=self.clock)
+
+    def test_expires_after_ttl(self):
+        """Test that get() misses once the ttl has passed."""
+        self.cache.set("k", "v")
+        self.clock.advance(9)
+        self.assertEqual(self.cache.get("k"), "v")
+        self.clock.advance(2)
+        self.assertIsNone(self.cache.get("k"))
+        self.assertEqual(self.cache.stats()["expirations"], 1)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_per_entry_ttl(self):
+        """Test that set(ttl=None) keeps an entry forever."""
+        self.cache.set("short", "v", ttl=1)
+        self.cache.set("forever", "v", ttl=None)
+        self.clock.advance(10 ** 6)
+        self.assertIsNone(self.cache.get("short"))
+        self.assertEqual(self.cache.get("forever"), "v")
+
+
+class TestQueryCacheInvalidation(unittest.TestCase):
+    """Test cases for table tags and the version snapshot."""
+
+    def setUp(self):
+        self.database = self.id()
+        self.cache = QueryCache()
+
+    def tags(self, *tables):
+        return dependency_tags(self.database, set(tables))
+
+    def test_write_evicts_dependent_entries(self):
+        """Test that only entries reading the written table are evicted."""
+        self.cache.set("users", 1, tags=self.tags("users"))
+        self.cache.set("orders", 2, tags=self.tags("orders"))
+        invalidate_tables(self.database, {"users"})
+        self.assertIsNone(self.cache.get("users"))
+        self.assertEqual(self.cache.get("orders"), 2)
+
+    def test_unknown_tables(self):
+        """Test unknown reads and unknown writes in both directions."""
+        self.cache.set("unknown", 1, tags=dependency_tags(self.database, None))
+        self.cache.set("orders", 2, tags=self.tags("orders"))
+        invalidate_tables(self.database, {"users"})
+        self.assertIsNone(self.cache.get("unknown"))
+        self.assertEqual(self.cache.get("orders"), 2)
+        invalidate_tables(self.database, None)
+        self.assertIsNone(self.cache.get("orders"))
+
+    def test_other_database_untouched(self):
+        """Test that a write to another database evicts nothing."""
+        self.cache.set("users", 1, tags=self.tags("users"))
+        invalidate_tables(self.database + "-other", None)
+        self.assertEqual(self.cache.get("users"), 1)
+
+    def test_set_dropped_after_concurrent_write(self):
+        """Test that a result read before a write is not cached."""
+        tags = self.tags("users")
+        versions = snapshot(tags)
+        invalidate_tables(self.database, {"users"})
+        self.assertFalse(self.cache.set("users", 1, tags=tags, versions=versions))
+        self.assertIsNone(self.cache.get("users"))
+
+
+    def test_write_tracker_publishes_on_commit(self):
+        """Test that a committed write through WriteTracker evicts readers."""
+        conn = sqlite3.connect(":memory:")
+        self.addCleanup(conn.close)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT)")
+        tags = dependency_tags(database_path(conn), {"users"})
+        self.cache.set("users", 1, tags=tags)
+        writes = WriteTracker(conn)
+        conn.execute("UPDATE users SET email = 'a@example.com' WHERE id = 1")
+        self.assertEqual(writes.tables, {"users"})
+        self.assertEqual(self.cache.get("users"), 1)
+        conn.commit()
+        writes.publish()
+        self.assertIsNone(self.cache.get("users"))
+
+
+class TestQueryCacheStale(unittest.TestCase):
+    """Test cases for stale_ttl."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = QueryCache(ttl=10, stale_ttl=5, clock=self.clock)
+
+    def test_serves_stale_while_refreshing(self):
+        """Test that a stale entry is returned while refresh() runs."""
+        self.cache.set("k", "old")
+        self.clock.advance(12)
+        refreshed = threading.Event()
+
+        def refresh():
+            refreshed.set()
+            return "new"
+
+        value = self.cache.get_or_load("k", lambda: self.fail("load called"),
+                                       refresh=refresh)
+        self.assertEqual(value, "old")
+        self.assertTrue(refreshed.wait(2))
+        wait_for(lambda: self.cache.get("k") == "new")
+        self.assertEqual(self.cache.stats()["stale_hits"], 1)
+
+    def test_stale_entry_dropped_after_stale_ttl(self):
+        """Test that past ttl + stale_ttl the entry is loaded again."""
+        self.cache.set("k", "old")
+        self.clock.advance(16)
+        self.assertEqual(self.cache.get_or_load("k", lambda: "new"), "new")
+        self.assertEqual(self.cache.stats()["expirations"], 1)
+
+    def test_failed_refresh_keeps_stale_entry(self):
+        """Test that a refresh error is counted and the entry kept."""
+        self.cache.set("k", "old")
+        self.clock.advance(12)
+
+        def refresh():
+            raise RuntimeError("database is down")
+
+        self.assertEqual(self.cache.get_or_load("k", None, refresh=refresh), "old")
+        wait_for(lambda: self.cache.stats()["refresh_errors"] == 1)
+        self.assertEqual(self.cache.get_or_load("k", None, refresh=refresh), "old")
+
+
+class TestQueryCacheSingleFlight(unittest.TestCase):
+    """Test cases for coalescing concurrent misses."""
+
+    def run_concurrently(self, cache, load, callers=5):
+        """Start one leader and `callers - 1` followers on the same key."""
+        started = threading.Event()
+        release = threading.Event()
+        results = [None] * callers
+
+        def blocking_load():
+            started.set()
+            release.wait(2)
+            return load()
+
+        def call(i):
+            try:
+                results[i] = cache.get_or_load("k", blocking_load)
+            except Exception as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=call, args=(0,))]
+        threads[0].start()
+        self.assertTrue(started.wait(2))
+        threads += [threading.Thread(target=call, args=(i,)) for i in range(1, callers)]
+        for thread in threads[1:]:
+            thread.start()
+        wait_for(lambda: cache.stats()["coalesced"] == callers - 1)
+        release.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_one_load_for_concurrent_misses(self):
+        """Test that every caller gets the result of a single load."""
+        loads = []
+
+        def load():
+            loads.append(1)
+            return "rows"
+
+        results = self.run_concurrently(QueryCache(), load)
+        self.assertEqual(results, ["rows"] * 5)
+        self.assertEqual(len(loads), 1)
+
+    def test_error_reaches_every_caller(self):
+        """Test that a failed load raises in the leader and all followers."""
+        error = RuntimeError("no such table: users")
+
+        def load():
+            raise error
+
+        cache = QueryCache()
+        results = self.run_concurrently(cache, load)
+        self.assertEqual(results, [error] * 5)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.get_or_load("k", lambda: "rows"), "rows")
+
+    def test_load_racing_a_write_is_not_cached(self):
+        """Test that get_or_load() returns but does not keep a stale read."""
+        def load():
+            invalidate_tables(self.id(), {"users"})
+            return "read before the write"
+
+        cache = QueryCache()
+        tags = dependency_tags(self.id(), {"users"})
+        self.assertEqual(cache.get_or_load("k", load, tags=tags),
+                         "read before the write")
+        self.assertEqual(cache.get_or_load("k", lambda: "fresh", tags=tags), "fresh")
+
+
+class TestTableParsing(unittest.TestCase):
+    """Test cases for tables_read and tables_written."""
+
+    def test_tables_read(self):
+        """Test FROM lists, joins, quoting and unknown reads."""
+        cases = [
+            ("SELECT * FROM users", {"users"}),
+            ("SELECT * FROM main.Users u JOIN orders o ON o.user_id = u.id",
+             {"users", "orders"}),
+            ("SELECT * FROM `users`, \"orders\" WHERE 1", {"users", "orders"}),
+            ("SELECT 1", None),
+        ]
+        for sql, expected in cases:
+            with self.subTest(sql=sql):
+                self.assertEqual(tables_read(sql), expected)
+
+    def test_tables_written(self):
+        """Test writes, reads, transaction control and unparseable statements."""
+        cases = [
+            ("INSERT INTO users (name) VALUES (?)", {"users"}),
+            ("INSERT OR REPLACE INTO users VALUES (?)", {"users"}),
+            ("UPDATE OR IGNORE users SET name = ?", {"users"}),
+            ("DELETE FROM main.users WHERE id = ?", {"users"}),
+            ("DROP TABLE IF EXISTS users", {"users"}),
+            ("SELECT * FROM users", set()),
+            ("BEGIN", set()),
+            ("WITH t AS (SELECT 1) DELETE FROM users", None),
+        ]
+        for sql, expected in cases:
+            with self.subTest(sql=sql):
+                self.assertEqual(tables_written(sql), expected)
+
+
+
+class TestDatabasePath(unittest.TestCase):
+    """Test cases for database_path."""
+
+    def test_in_memory(self):
+        """Test that an in-memory database has an empty path."""
+        conn = sqlite3.connect(":memory:")
+        self.addCleanup(conn.close)
+        self.assertEqual(database_path(conn), "")
+
+    def test_looked_up_once_per_pooled_connection(self):
+        """Test that repeated calls do not query the connection again."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "users.db")
+        pool = ThreadLocalPool(path)
+        self.addCleanup(pool.close)
+        conn = pool.acquire()
+        statements = []
+        conn.set_trace_callback(statements.append)
+        self.assertEqual(database_path(conn), os.path.realpath(path))
+        self.assertEqual(database_path(conn), os.path.realpath(path))
+        conn.set_trace_callback(None)
+        self.assertEqual(statements, ["PRAGMA database_list"])
+
+
+if __name__ == "__main__":
+    unittest.main()
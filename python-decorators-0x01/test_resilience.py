@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Unit tests for resilience.py and retry_on_failure.
+"""
+import contextlib
+import io
+import sqlite3
+import unittest
+from resilience import (CircuitBreaker, CircuitOpen, decorrelated_jitter,
+                        exponential, fixed, is_transient)
+from fixtures import FakeClock
+
+retry_on_failure = __import__('3-retry_on_failure').retry_on_failure
+
+
+class TestBackoff(unittest.TestCase):
+    """Test cases for the backoff policies."""
+
+    def test_fixed(self):
+        """Test that fixed() ignores the attempt number."""
+        delay = fixed(2)
+        self.assertEqual([delay(attempt, None) for attempt in range(3)], [2, 2, 2])
+
+    def test_exponential_without_jitter(self):
+        """Test that the delay doubles up to the cap."""
+        delay = exponential(base=0.1, cap=0.5, jitter=False)
+        self.assertEqual([round(delay(attempt, None), 6) for attempt in range(5)],
+                         [0.1, 0.2, 0.4, 0.5, 0.5])
+
+    def test_exponential_full_jitter(self):
+        """Test that jittered delays stay between 0 and the ceiling."""
+        delay = exponential(base=0.1, cap=0.5)
+        for attempt in range(6):
+            ceiling = min(0.5, 0.1 * 2 ** attempt)
+            for _ in range(100):
+                self.assertTrue(0 <= delay(attempt, None) <= ceiling)
+
+    def test_decorrelated_jitter(self):
+        """Test that each delay is within base and three times the previous, capped."""
+        delay = decorrelated_jitter(base=0.1, cap=1.0)
+        previous = None
+        for attempt in range(50):
+            pause = delay(attempt, previous)
+            self.assertGreaterEqual(pause, 0.1)
+            self.assertLessEqual(pause, min(1.0, (previous or 0.1) * 3))
+            previous = pause
+
+
+class TestIsTransient(unittest.TestCase):
+    """Test cases for is_transient."""
+
+    def test_classification(self):
+        """Test lock errors are transient and others are not."""
+        cases = [
+            (sqlite3.OperationalError("database is locked"), True),
+            (sqlite3.OperationalError("Database table is locked: users"), True),
+            (sqlite3.OperationalError("no such table: users"), False),
+            (sqlite3.IntegrityError("UNIQUE constraint failed"), False),
+            (ValueError("database is locked"), False),
+        ]
+        for error, expected in cases:
+            with self.subTest(error=error):
+                self.assertIs(is_transient(error), expected)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test cases for CircuitBreaker."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10,
+                                      clock=self.clock)
+
+    def trip(self):
+        for _ in range(3):
+            self.breaker.before_call()
+            self.breaker.record_failure()
+
+    def test_opens_after_threshold(self):
+        """Test that consecutive failures open the circuit."""
+        for _ in range(2):
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "closed")
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "open")
+        with self.assertRaises(CircuitOpen):
+            self.breaker.before_call()
+
+    def test_success_resets_failures(self):
+        """Test that a success between failures keeps the circuit closed."""
+        for _ in range(2):
+            self.breaker.record_failure()
+        self.breaker.record_success()
+        for _ in range(2):
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_half_open_allows_one_trial(self):
+        """Test that only one call gets through after reset_timeout."""
+        self.trip()
+        self.clock.advance(10)
+        self.assertEqual(self.breaker.state, "half-open")
+        self.breaker.before_call()
+        with self.assertRaises(CircuitOpen):
+            self.breaker.before_call()
+
+    def test_trial_success_closes(self):
+        """Test that a successful trial closes the circuit."""
+        self.trip()
+        self.clock.advance(10)
+        self.breaker.before_call()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, "closed")
+        self.breaker.before_call()
+
+    def test_trial_failure_reopens(self):
+        """Test that a failed trial opens the circuit for another timeout."""
+        self.trip()
+        self.clock.advance(10)
+        self.breaker.before_call()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "open")
+        self.clock.advance(9)
+        with self.assertRaises(CircuitOpen):
+            self.breaker.before_call()
+
+
+class TestRetryOnFailure(unittest.TestCase):
+    """Test cases for retry_on_failure with the resilience options."""
+
+    def setUp(self):
+        # retry_on_failure prints every attempt.
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+
+    def flaky(self, errors):
+        """Function raising each of `errors` in turn, then returning "ok"."""
+        calls = []
+
+        def func():
+            calls.append(1)
+            if len(calls) <= len(errors):
+                raise errors[len(calls) - 1]
+            return "ok"
+        return func, calls
+
+    def test_rejects_fewer_than_one_retry(self):
+        """Test that retries=0 is refused up front."""
+        with self.assertRaises(ValueError):
+            retry_on_failure(retries=0)
+
+    def test_retries_transient_errors(self):
+        """Test that transient errors are retried until success."""
+        func, calls = self.flaky([sqlite3.OperationalError("database is locked")] * 2)
+        wrapped = retry_on_failure(retries=3, backoff=fixed(0), retry_if=is_transient)(func)
+        self.assertEqual(wrapped(), "ok")
+        self.assertEqual(len(calls), 3)
+
+    def test_does_not_retry_other_errors(self):
+        """Test that a non-transient error is raised on the first attempt."""
+        func, calls = self.flaky([sqlite3.OperationalError("no such table: users")])
+        wrapped = retry_on_failure(retries=3, backoff=fixed(0), retry_if=is_transient)(func)
+        with self.assertRaises(sqlite3.OperationalError):
+            wrapped()
+        self.assertEqual(len(calls), 1)
+
+    def test_raises_last_error_when_exhausted(self):
+        """Test that the final attempt's error is raised."""
+        errors = [sqlite3.OperationalError("database is locked %d" % i) for i in range(3)]
+        func, calls = self.flaky(errors)
+        wrapped = retry_on_failure(retries=3, backoff=fixed(0))(func)
+        with self.assertRaises(sqlite3.OperationalError) as context:
+            wrapped()
+        self.assertIs(context.exception, errors[-1])
+
+    def test_deadline_stops_retrying(self):
+        """Test that no retry starts once it would pass the deadline."""
+        func, calls = self.flaky([sqlite3.OperationalError("database is locked")] * 3)
+        wrapped = retry_on_failure(retries=3, backoff=fixed(5), deadline=1)(func)
+        with self.assertRaises(sqlite3.OperationalError):
+            wrapped()
+        self.assertEqual(len(calls), 1)
+
+    def test_open_breaker_fails_fast(self):
+        """Test that once the breaker opens the function is not called."""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        func, calls = self.flaky([sqlite3.OperationalError("database is locked")] * 5)
+        wrapped = retry_on_failure(retries=5, backoff=fixed(0), breaker=breaker)(func)
+        with self.assertRaises(CircuitOpen):
+            wrapped()
+        self.assertEqual(len(calls), 2)
+
+    def test_interrupted_trial_releases_breaker(self):
+        """Test that a BaseException in the half-open trial reopens the circuit."""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        func, calls = self.flaky([sqlite3.OperationalError("database is locked"),
+                                  KeyboardInterrupt()])
+        wrapped = retry_on_failure(retries=1, breaker=breaker)(func)
+        with self.assertRaises(sqlite3.OperationalError):
+            wrapped()
+        clock.advance(10)
+        with self.assertRaises(KeyboardInterrupt):
+            wrapped()
+        self.assertEqual(breaker.state, "open")
+        clock.advance(10)
+        self.assertEqual(wrapped(), "ok")
+        self.assertEqual(breaker.state, "closed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Unit tests for sqlite_pool.py.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from sqlite_pool import DEFAULT_PRAGMAS, Connection, ThreadLocalPool, get_pool
+
+
+class TestThreadLocalPool(unittest.TestCase):
+    """Test cases for ThreadLocalPool."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.pool = ThreadLocalPool(os.path.join(directory.name, "users.db"))
+        self.addCleanup(self.pool.close)
+        conn = self.pool.acquire()
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.commit()
+        self.pool.release(conn)
+
+    def in_thread(self, func):
+        """Run func in a new thread and return its result."""
+        results = []
+        thread = threading.Thread(target=lambda: results.append(func()))
+        thread.start()
+        thread.join()
+        return results[0]
+
+    def borrow(self):
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+        return conn
+
+    def test_same_connection_per_thread(self):
+        """Test that a thread gets its connection back and others get their own."""
+        conn = self.borrow()
+        self.assertIs(self.borrow(), conn)
+        self.assertIsInstance(conn, Connection)
+        self.assertIsNot(self.in_thread(self.borrow), conn)
+
+    def test_pragmas_applied(self):
+        """Test that DEFAULT_PRAGMAS are set on a new connection."""
+        conn = self.borrow()
+        cases = [
+            ("journal_mode", "wal"),
+            ("synchronous", 1),
+            ("cache_size", DEFAULT_PRAGMAS["cache_size"]),
+            ("busy_timeout", DEFAULT_PRAGMAS["busy_timeout"]),
+        ]
+        for name, value in cases:
+            with self.subTest(pragma=name):
+                self.assertEqual(conn.execute(f"PRAGMA {name}").fetchone()[0], value)
+
+    def test_release_rolls_back(self):
+        """Test that uncommitted changes are discarded on release."""
+        conn = self.pool.acquire()
+        conn.execute("INSERT INTO users (name) VALUES ('Ada')")
+        self.pool.release(conn)
+        self.assertFalse(conn.in_transaction)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM users").fetchone(), (0,))
+
+    def test_nested_borrow_keeps_transaction(self):
+        """Test that only the outermost release rolls back."""
+        outer = self.pool.acquire()
+        outer.execute("INSERT INTO users (name) VALUES ('Ada')")
+        inner = self.pool.acquire()
+        self.assertIs(inner, outer)
+        self.pool.release(inner)
+        self.assertTrue(outer.in_transaction)
+        self.pool.release(outer)
+        self.assertFalse(outer.in_transaction)
+
+    def test_closed_connection_is_replaced(self):
+        """Test that a connection closed by its borrower is not handed out again."""
+        conn = self.pool.acquire()
+        conn.close()
+        self.pool.release(conn)
+        replacement = self.borrow()
+        self.assertIsNot(replacement, conn)
+        self.assertEqual(replacement.execute("SELECT COUNT(*) FROM users").fetchone(), (0,))
+
+    def test_stats_and_close(self):
+        """Test the counters and that close() closes every thread's connection."""
+        conn = self.borrow()
+        self.borrow()
+        other = self.in_thread(self.borrow)
+        stats = self.pool.stats()
+        self.assertEqual(stats["opened"], 2)
+        self.assertGreaterEqual(stats["reused"], 2)
+        self.pool.close()
+        self.assertEqual(self.pool.stats()["open"], 0)
+        for closed in (conn, other):
+            with self.assertRaises(sqlite3.ProgrammingError):
+                closed.execute("SELECT 1")
+
+
+class TestGetPool(unittest.TestCase):
+    """Test cases for get_pool."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "users.db")
+
+    def test_one_pool_per_database(self):
+        """Test that every call for a database returns the same pool."""
+        pool = get_pool(self.path)
+        self.addCleanup(pool.close)
+        self.assertIs(get_pool(self.path), pool)
+        self.assertIs(get_pool(self.path, DEFAULT_PRAGMAS), pool)
+
+    def test_conflicting_pragmas(self):
+        """Test that asking for other PRAGMAs than the pool's raises."""
+        pool = get_pool(self.path, dict(DEFAULT_PRAGMAS, synchronous="FULL"))
+        self.addCleanup(pool.close)
+        self.assertIs(get_pool(self.path), pool)
+        with self.assertRaises(ValueError):
+            get_pool(self.path, DEFAULT_PRAGMAS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Unit tests for statements.py.
+"""
+import sqlite3
+import threading
+import unittest
+from statements import MAX_PREPARED, batched, execute, in_clause
+
+
+class FakeCursor:
+    """Prepared cursor recording the statements it executed."""
+
+    def __init__(self):
+        self.executed = []
+        self.closed = False
+
+    def execute(self, sql, params):
+        self.executed.append((sql, params))
+
+    def close(self):
+        self.closed = True
+
+
+class FakeMySQLConnection:
+    """Stands in for a mysql.connector connection."""
+
+    raw = False  # mysql.connector's raw-results flag
+
+    def __init__(self):
+        self.cursors = []
+
+    def cursor(self, prepared=False):
+        cursor = FakeCursor()
+        self.cursors.append(cursor)
+        return cursor
+
+
+class FakePooledConnection:
+    """Per-borrow wrapper like db_pool.PooledConnection."""
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    @property
+    def raw(self):
+        return self._raw
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class TestExecute(unittest.TestCase):
+    """Test cases for execute."""
+
+    def test_sqlite_passthrough(self):
+        """Test that sqlite3 connections use their own statement cache."""
+        conn = sqlite3.connect(":memory:")
+        self.addCleanup(conn.close)
+        self.assertEqual(execute(conn, "SELECT ? + 1", (1,)).fetchone(), (2,))
+
+    def test_reuses_prepared_cursor(self):
+        """Test that the same SQL reuses one prepared cursor."""
+        conn = FakeMySQLConnection()
+        first = execute(conn, "SELECT * FROM users WHERE id = %s", (1,))
+        second = execute(conn, "SELECT * FROM users WHERE id = %s", (2,))
+        self.assertIs(first, second)
+        self.assertEqual(len(conn.cursors), 1)
+
+    def test_reuses_prepared_cursor_across_borrows(self):
+        """Test that a new pool wrapper per borrow still hits the cache."""
+        raw = FakeMySQLConnection()
+        for user_id in range(3):
+            execute(FakePooledConnection(raw), "SELECT * FROM users WHERE id = %s",
+                    (user_id,))
+        self.assertEqual(len(raw.cursors), 1)
+        self.assertEqual(len(raw.cursors[0].executed), 3)
+
+    def test_closes_least_recently_used(self):
+        """Test that at most MAX_PREPARED cursors stay open."""
+        conn = FakeMySQLConnection()
+        for i in range(MAX_PREPARED + 1):
+            execute(conn, "SELECT %d" % i)
+        self.assertTrue(conn.cursors[0].closed)
+        self.assertEqual(sum(not cursor.closed for cursor in conn.cursors), MAX_PREPARED)
+
+
+class TestInClause(unittest.TestCase):
+    """Test cases for in_clause."""
+
+    def test_pads_to_power_of_two(self):
+        """Test placeholder counts and padding with the last value."""
+        cases = [
+            ([1], "?", [1]),
+            ([1, 2, 3], "?, ?, ?, ?", [1, 2, 3, 3]),
+            (range(5), ", ".join("?" * 8), [0, 1, 2, 3, 4, 4, 4, 4]),
+        ]
+        for values, marks, params in cases:
+            with self.subTest(values=values):
+                self.assertEqual(in_clause(values), (marks, params))
+
+    def test_empty(self):
+        """Test that an empty IN list is refused."""
+        with self.assertRaises(ValueError):
+            in_clause([])
+
+
+class TestBatched(unittest.TestCase):
+    """Test cases for the batched decorator."""
+
+    def call_concurrently(self, func, keys):
+        """Call func(key) for every key from its own thread."""
+        outcomes = {}
+
+        def call(key):
+            try:
+                outcomes[key] = func(key)
+            except Exception as e:
+                outcomes[key] = e
+
+        threads = [threading.Thread(target=call, args=(key,)) for key in keys]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_coalesces_concurrent_calls(self):
+        """Test that concurrent keys are loaded by one call."""
+        loads = []
+
+        @batched(max_batch=4, window=2)
+        def load(keys):
+            loads.append(sorted(keys))
+            return {key: key * 10 for key in keys if key != 3}
+
+        outcomes = self.call_concurrently(load, [1, 2, 3, 4])
+        self.assertEqual(loads, [[1, 2, 3, 4]])
+        self.assertEqual(outcomes, {1: 10, 2: 20, 3: None, 4: 40})
+
+    def test_error_reaches_every_caller(self):
+        """Test that an exception from the loader is raised in each caller."""
+        error = RuntimeError("no such table: users")
+
+        @batched(max_batch=3, window=2)
+        def load(keys):
+            raise error
+
+        self.assertEqual(self.call_concurrently(load, [1, 2, 3]),
+                         {1: error, 2: error, 3: error})
+
+    def test_rejects_non_mapping_result(self):
+        """Test that a loader returning None raises a clear TypeError."""
+        @batched(window=0)
+        def load(keys):
+            pass
+
+        with self.assertRaises(TypeError) as context:
+            load(1)
+        self.assertIn("load() must return a mapping", str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,20 +1,92 @@
+import functools
+import queue
+import threading
+from collections import namedtuple
+
 import seed
+from channels import DONE, put
+from schema import select_list
 import mysql.connector
 from mysql.connector import Error
-def stream_users():
-    try: 
+
+@functools.lru_cache(maxsize=None)
+def row_type(columns):
+    """Namedtuple class for a tuple of column names, built once per shape."""
+    return namedtuple("UserRow", columns)
+
+
+def _prefetch_chunks(cursor, chunk_size, prefetch):
+    """
+    Yield fetchmany() chunks read ahead by a background thread, keeping
+    at most `prefetch` chunks in memory so fetching overlaps with the
+    consumer without letting the buffer grow unbounded.
+    """
+    chunks = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+
+    def fetch():
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                if not put(chunks, rows, stop.is_set):
+                    return
+            put(chunks, DONE, stop.is_set)
+        except BaseException as e:
+            put(chunks, e, stop.is_set)
+
+    fetcher = threading.Thread(target=fetch, name="stream_users-prefetch", daemon=True)
+    fetcher.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        fetcher.join()
+
+
+def stream_users(prefetch=0, chunk_size=1000, rows="dict", columns=None):
+    """
+    Yield users one at a time.
+    prefetch:   number of `chunk_size` chunks to read ahead on a background
+                thread; 0 reads rows inline
+    rows:       "dict" for a dict per row, "tuple" for a namedtuple per row
+    columns:    column names to fetch instead of SELECT *
+    """
+    if rows not in ("dict", "tuple"):
+        raise ValueError(f"Unknown row format: {rows!r}")
+    prodevconnection = None
+    cursor = None
+    prefetcher = None
+    try:
         prodevconnection = seed.connect_to_prodev()
         cursor = prodevconnection.cursor(buffered=False)
-        cursor.execute("SELECT * FROM user_data")
-        columns = cursor.column_names
-        for row in cursor:
-            yield dict(zip(columns, row))
+        cursor.execute(f"SELECT {select_list(prodevconnection, columns)} FROM user_data")
+        columns = tuple(cursor.column_names)
+        make_row = row_type(columns)._make if rows == "tuple" else None
+
+        if prefetch:
+            prefetcher = _prefetch_chunks(cursor, chunk_size, prefetch)
+        for chunk in prefetcher or (cursor,):
+            if make_row is not None:
+                yield from map(make_row, chunk)
+            else:
+                for row in chunk:
+                    yield dict(zip(columns, row))
 
     except Error as e:
         print(f"Error: {e}")
-        
+
     finally:
+        if prefetcher is not None:
+            prefetcher.close()
         if cursor:
             cursor.close()
         if prodevconnection:
-            prodevconnection.close()
\ No newline at end of file
+            prodevconnection.close()
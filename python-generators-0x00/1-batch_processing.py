@@ -1,34 +1,51 @@
 import seed
 import mysql.connector
 from mysql.connector import Error
+from columnar import UserBatch
+from predicates import Col, where_clause
 
-def stream_users_in_batches(batch_size=100):
-    try: 
+OLDER_THAN_25 = Col("age") > 25
+
+def stream_users_in_batches(batch_size=100, columnar=False, where=None):
+    """
+    Yield lists of user dicts, or UserBatch column batches when
+    `columnar` is True. `where` is a predicates.Predicate evaluated
+    by MySQL, so rows it rejects are never transferred.
+    """
+    connection = None
+    cursor = None
+    try:
         connection = seed.connect_to_prodev()
         cursor = connection.cursor(buffered=False)
-        cursor.execute("SELECT * FROM user_data")
+        clause, params = where_clause(where)
+        cursor.execute("SELECT * FROM user_data" + clause, params or None)
         columns = cursor.column_names
-        batch=[]
-        for row in cursor:
-            batch.append(zip(dict(columns,row)))
-            if len(batch) == batch_size:
-                yield batch
-                batch = []
-        if batch:
-            yield batch
-            
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            if columnar:
+                yield UserBatch.from_rows(columns, rows)
+            else:
+                yield [dict(zip(columns, row)) for row in rows]
+
     except Error as e:
         print(f"Error: {e}")
-        
+
     finally:
         if cursor:
             cursor.close()
-        if connection and connection.is_connected():
+        if connection:
             connection.close()
-            return
 
-def batch_processing(batch_size=100):
-    for batch in stream_users_in_batches(batch_size):
-        filtered=[user for user in batch if user['age']>25]
-        yield filtered
-    return
\ No newline at end of file
+def batch_processing(batch_size=100, columnar=False, where=OLDER_THAN_25, pushdown=True):
+    """
+    Yield batches of users matching `where`. With `pushdown` the filter
+    runs in MySQL; otherwise every row is fetched and filtered in Python.
+    """
+    if pushdown:
+        yield from stream_users_in_batches(batch_size, columnar, where)
+        return
+    for batch in stream_users_in_batches(batch_size, columnar):
+        yield batch if where is None else where.filter(batch)
+    return
@@ -1,21 +1,96 @@
+import base64
+import json
+
 import seed
+from schema import select_list
 import mysql.connector
 from mysql.connector import Error
 
-def paginate_users(page_size, offset):
+def paginate_users(page_size, offset, columns=None):
     connection = seed.connect_to_prodev()
     cursor = connection.cursor(dictionary=True)
-    cursor.execute(f"SELECT * FROM user_data LIMIT {page_size} OFFSET {offset}")
+    projection = select_list(connection, columns)
+    cursor.execute(f"SELECT {projection} FROM user_data LIMIT {page_size} OFFSET {offset}")
     rows = cursor.fetchall()
+    cursor.close()
     connection.close()
     return rows
 
-def lazy_paginate(page_size):
+def paginate_users_after(connection, page_size, after=None, columns=None):
+    """
+    Fetch the page of users whose user_id sorts after `after`.
+    Seeks on the user_id primary key, so a deep page costs the same
+    as the first one instead of scanning every skipped row.
+    """
+    projection = select_list(connection, columns)
+    cursor = connection.cursor(dictionary=True)
+    try:
+        if after is None:
+            cursor.execute(
+                f"SELECT {projection} FROM user_data ORDER BY user_id LIMIT %s",
+                (page_size,)
+            )
+        else:
+            cursor.execute(
+                f"SELECT {projection} FROM user_data WHERE user_id > %s ORDER BY user_id LIMIT %s",
+                (after, page_size)
+            )
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+def encode_cursor(user_id):
+    payload = json.dumps({"after": user_id}).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+def decode_cursor(token):
+    if not token:
+        return None
+    try:
+        payload = base64.urlsafe_b64decode(token.encode("ascii"))
+        return json.loads(payload)["after"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid pagination cursor: {token!r}") from e
+
+def next_cursor(page):
+    """Return the token that resumes pagination right after `page`."""
+    if not page:
+        return None
+    return encode_cursor(page[-1]["user_id"])
+
+def keyset_paginate(page_size, cursor=None, columns=None):
+    """
+    Yield pages of users in user_id order over a single connection.
+    Pass the token from next_cursor() as `cursor` to resume a walk.
+    A `columns` projection always includes user_id, the seek key.
+    """
+    after = decode_cursor(cursor)
+    if columns is not None:
+        columns = (columns,) if isinstance(columns, str) else tuple(columns)
+        if "user_id" not in columns:
+            columns += ("user_id",)
+    connection = seed.connect_to_prodev()
+    try:
+        while True:
+            users = paginate_users_after(connection, page_size, after, columns)
+            if not users:
+                break
+            yield users
+            if len(users) < page_size:
+                break
+            after = users[-1]["user_id"]
+    finally:
+        connection.close()
+
+def lazy_paginate(page_size, keyset=False, cursor=None, columns=None):
+    if keyset:
+        yield from keyset_paginate(page_size, cursor, columns)
+        return
     offset=0
     while True:
-        users=paginate_users(page_size, offset)
+        users=paginate_users(page_size, offset, columns)
         if not users:
             break
         yield users
         offset+=page_size
-    return
\ No newline at end of file
+    return
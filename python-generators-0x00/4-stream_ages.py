@@ -1,6 +1,7 @@
 import seed
 import mysql.connector
 from mysql.connector import Error
+from aggregates import pushdown_aggregates, RunningStats
 
 
 def stream_user_ages():
@@ -13,14 +14,26 @@ def stream_user_ages():
     connection.close()
     
 
-def calculate_average_age():
-    total = 0
-    count = 0
-    for age in stream_user_ages:
-        total+=age
-        count+=1
-    if count>0:
-        average=total/count
-        print(f"Average age of users:{calculate_average_age()} ")
+def average_age(pushdown=True):
+    """
+    Return the average user age, or None when there are no users.
+    With `pushdown` MySQL computes AVG(age); otherwise ages are streamed
+    through a single-pass RunningStats.
+    """
+    if pushdown:
+        connection = seed.connect_to_prodev()
+        try:
+            result = pushdown_aggregates(connection, "age", ("count", "avg"))
+        finally:
+            connection.close()
+        return float(result["avg"]) if result["count"] else None
+    stats = RunningStats().update(stream_user_ages())
+    return stats.mean if stats.count else None
+
+
+def calculate_average_age(pushdown=True):
+    average = average_age(pushdown)
+    if average is not None:
+        print(f"Average age of users: {average}")
     else:
-        print("No users Found.")
\ No newline at end of file
+        print("No users Found.")
@@ -0,0 +1,151 @@
+"""
+Aggregates over user_data columns.
+
+pushdown_aggregates() lets MySQL compute COUNT/AVG/MIN/MAX/percentiles so
+only the results cross the wire. RunningStats and ReservoirQuantiles are
+single-pass fallbacks that work over any iterable of numbers, such as the
+generators in this directory.
+"""
+import math
+import random
+
+from predicates import quote_identifier, where_clause
+
+_SQL_AGGREGATES = {
+    "count": "COUNT({})",
+    "avg": "AVG({})",
+    "min": "MIN({})",
+    "max": "MAX({})",
+    "sum": "SUM({})",
+    "stddev": "STDDEV_POP({})",
+    "variance": "VAR_POP({})",
+}
+
+
+def pushdown_aggregates(connection, column, aggregates=("count", "avg", "min", "max"),
+                        percentiles=(), table="user_data", where=None):
+    """
+    Compute aggregates of `column` in MySQL and return them as a dict.
+    Percentiles (0-100) use the nearest-rank method, each resolved with an
+    ORDER BY ... LIMIT 1 OFFSET k seek since MySQL has no PERCENTILE_CONT.
+    """
+    quoted = quote_identifier(column)
+    clause, params = where_clause(where)
+    unknown = set(aggregates) - set(_SQL_AGGREGATES)
+    if unknown:
+        raise ValueError(f"Unsupported aggregates: {sorted(unknown)}")
+    wanted = list(aggregates)
+    if percentiles and "count" not in wanted:
+        wanted.append("count")
+
+    cursor = connection.cursor()
+    try:
+        select = ", ".join(_SQL_AGGREGATES[name].format(quoted) for name in wanted)
+        cursor.execute(f"SELECT {select} FROM {quote_identifier(table)}{clause}", params or None)
+        results = dict(zip(wanted, cursor.fetchone()))
+
+        count = results["count"] if percentiles else 0
+        for p in percentiles:
+            if not count:
+                results[f"p{p:g}"] = None
+                continue
+            rank = max(1, math.ceil(p / 100 * count))
+            cursor.execute(
+                f"SELECT {quoted} FROM {quote_identifier(table)}{clause} "
+                f"ORDER BY {quoted} LIMIT 1 OFFSET %s",
+                params + [rank - 1]
+            )
+            results[f"p{p:g}"] = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    return {name: results[name] for name in list(aggregates) + [f"p{p:g}" for p in percentiles]}
+
+
+class RunningStats:
+    """Exact single-pass count, mean, variance, min and max (Welford)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+        return self
+
+    @property
+    def variance(self):
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def stddev(self):
+        return math.sqrt(self.variance)
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "avg": self.mean if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "variance": self.variance,
+        }
+
+
+class ReservoirQuantiles:
+    """Approximate quantiles from a fixed-size uniform sample (Algorithm R)."""
+
+    def __init__(self, size=10000, seed=None):
+        self.size = size
+        self.seen = 0
+        self.sample = []
+        self._random = random.Random(seed)
+
+    def add(self, value):
+        self.seen += 1
+        if len(self.sample) < self.size:
+            self.sample.append(value)
+            return
+        slot = self._random.randrange(self.seen)
+        if slot < self.size:
+            self.sample[slot] = value
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+        return self
+
+    def quantile(self, p):
+        """Nearest-rank percentile `p` (0-100); exact while seen <= size."""
+        if not self.sample:
+            return None
+        ordered = sorted(self.sample)
+        rank = max(1, math.ceil(p / 100 * len(ordered)))
+        return ordered[rank - 1]
+
+
+def streaming_aggregates(values, percentiles=(), reservoir_size=10000):
+    """Single-pass equivalent of pushdown_aggregates() over any iterable."""
+    stats = RunningStats()
+    quantiles = ReservoirQuantiles(reservoir_size) if percentiles else None
+    for value in values:
+        stats.add(value)
+        if quantiles is not None:
+            quantiles.add(value)
+    results = stats.as_dict()
+    for p in percentiles:
+        results[f"p{p:g}"] = quantiles.quantile(p)
+    return results
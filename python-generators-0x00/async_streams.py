@@ -0,0 +1,108 @@
+"""
+`async for` versions of the user_data generators, backed by an aiomysql
+pool and unbuffered (server-side) SSCursors, so asyncio services can
+consume user streams without a thread per stream.
+
+    async for user in stream_users():
+        ...
+"""
+import asyncio
+import os
+import weakref
+
+import aiomysql
+from dotenv import load_dotenv
+
+lazy_paginate_module = __import__('2-lazy_paginate')
+load_dotenv()
+
+_pools = weakref.WeakKeyDictionary()
+
+
+async def get_pool():
+    """Return the aiomysql pool for the running event loop."""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = await aiomysql.create_pool(
+            host=os.getenv("MYSQL_HOST", "localhost"),
+            user=os.getenv("MYSQL_USER", "root"),
+            password=os.getenv("MYSQL_PASSWORD", ""),
+            db=os.getenv("MYSQL_DATABASE", "ALX_prodev"),
+            minsize=1,
+            maxsize=int(os.getenv("MYSQL_POOL_SIZE", "5")),
+            autocommit=True,
+        )
+        # Another task may have created one while we were connecting.
+        if loop in _pools:
+            pool.close()
+            await pool.wait_closed()
+        else:
+            _pools[loop] = pool
+    return _pools[loop]
+
+
+async def close_pool():
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        pool.close()
+        await pool.wait_closed()
+
+
+async def _stream(query, params=None, cursor_class=aiomysql.SSDictCursor, chunk_size=1000):
+    pool = await get_pool()
+    async with pool.acquire() as connection:
+        async with connection.cursor(cursor_class) as cursor:
+            await cursor.execute(query, params)
+            while True:
+                rows = await cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+
+
+async def stream_users(chunk_size=1000):
+    async for rows in _stream("SELECT * FROM user_data", chunk_size=chunk_size):
+        for row in rows:
+            yield row
+
+
+async def stream_users_in_batches(batch_size=100):
+    async for rows in _stream("SELECT * FROM user_data", chunk_size=batch_size):
+        yield rows
+
+
+async def paginate_users_after(page_size, after=None):
+    pool = await get_pool()
+    async with pool.acquire() as connection:
+        async with connection.cursor(aiomysql.DictCursor) as cursor:
+            if after is None:
+                await cursor.execute(
+                    "SELECT * FROM user_data ORDER BY user_id LIMIT %s", (page_size,)
+                )
+            else:
+                await cursor.execute(
+                    "SELECT * FROM user_data WHERE user_id > %s ORDER BY user_id LIMIT %s",
+                    (after, page_size)
+                )
+            return await cursor.fetchall()
+
+
+async def lazy_paginate(page_size, cursor=None):
+    """Keyset pagination; tokens are shared with 2-lazy_paginate.next_cursor()."""
+    after = lazy_paginate_module.decode_cursor(cursor)
+    while True:
+        users = await paginate_users_after(page_size, after)
+        if not users:
+            break
+        yield users
+        if len(users) < page_size:
+            break
+        after = users[-1]["user_id"]
+
+
+async def stream_user_ages(chunk_size=1000):
+    async for rows in _stream("SELECT age FROM user_data", cursor_class=aiomysql.SSCursor,
+                              chunk_size=chunk_size):
+        for (age,) in rows:
+            yield age
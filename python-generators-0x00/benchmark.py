@@ -0,0 +1,283 @@
+"""
+Benchmarks for the user_data generators.
+Run with: python3 benchmark.py <name> [args...]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import seed
+from bulk_load import bulk_load
+from partitioned_scan import partitioned_scan
+from stream_ops import Stream
+from aggregates import pushdown_aggregates, streaming_aggregates
+from columnar import UserBatch
+
+lazy_paginate = __import__('2-lazy_paginate')
+stream_ages = __import__('4-stream_ages')
+
+
+def _timed(func, *args, repeat=5):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_pagination(page_size=100, offsets=(0, 1000, 10000, 100000)):
+    """Compare page latency of LIMIT/OFFSET against keyset seeks."""
+    connection = seed.connect_to_prodev()
+    cursor = connection.cursor()
+    print(f"{'offset':>10} {'offset ms':>10} {'keyset ms':>10}")
+    try:
+        for offset in offsets:
+            after = None
+            if offset:
+                cursor.execute(
+                    "SELECT user_id FROM user_data ORDER BY user_id LIMIT 1 OFFSET %s",
+                    (offset - 1,)
+                )
+                row = cursor.fetchone()
+                if row is None:
+                    break
+                after = row[0]
+            offset_time, _ = _timed(lazy_paginate.paginate_users, page_size, offset)
+            keyset_time, _ = _timed(
+                lazy_paginate.paginate_users_after, connection, page_size, after
+            )
+            print(f"{offset:>10} {offset_time * 1000:>10.2f} {keyset_time * 1000:>10.2f}")
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def bench_pool(threads=8, calls=50):
+    """Run SELECT 1 from many threads with and without the connection pool."""
+    def worker(pooled):
+        for _ in range(calls):
+            connection = seed.connect_to_prodev(pooled=pooled)
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            connection.close()
+
+    for pooled in (False, True):
+        workers = [threading.Thread(target=worker, args=(pooled,)) for _ in range(threads)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        label = "pooled" if pooled else "connect"
+        print(f"{label:>8}: {threads * calls / elapsed:10.1f} queries/s")
+    print(f"pool stats: {seed.get_pool().stats()}")
+
+
+def _synthetic_rows(rows):
+    return [
+        (f"{i:08x}-0000-0000-0000-000000000000", f"User {i % 5000}",
+         f"user{i}@example.com", i % 100)
+        for i in range(rows)
+    ]
+
+
+def bench_columnar(rows=1_000_000, batch_size=10_000):
+    """Filter age > 25 over synthetic rows: dict batches vs column batches."""
+    columns = ("user_id", "name", "email", "age")
+    data = _synthetic_rows(rows)
+    chunks = [data[i:i + batch_size] for i in range(0, rows, batch_size)]
+    dict_batches = [[dict(zip(columns, row)) for row in chunk] for chunk in chunks]
+    column_batches = [UserBatch.from_rows(columns, chunk) for chunk in chunks]
+
+    def filter_dicts():
+        return sum(len([u for u in batch if u["age"] > 25]) for batch in dict_batches)
+
+    def filter_columns():
+        return sum(len(batch.filter("age", ">", 25)) for batch in column_batches)
+
+    dict_time, kept = _timed(filter_dicts, repeat=3)
+    column_time, column_kept = _timed(filter_columns, repeat=3)
+    assert kept == column_kept
+    print(f"rows={rows} kept={kept}")
+    print(f"   dicts: {dict_time * 1000:10.1f} ms")
+    print(f" columns: {column_time * 1000:10.1f} ms")
+
+
+def bench_aggregates(repeat=3):
+    """Compare SQL aggregate pushdown with streaming every age into Python."""
+    percentiles = (50, 90, 99)
+
+    def pushdown():
+        connection = seed.connect_to_prodev()
+        try:
+            return pushdown_aggregates(connection, "age", percentiles=percentiles)
+        finally:
+            connection.close()
+
+    def streaming():
+        return streaming_aggregates(stream_ages.stream_user_ages(), percentiles)
+
+    pushdown_time, pushed = _timed(pushdown, repeat=repeat)
+    streaming_time, streamed = _timed(streaming, repeat=repeat)
+    print(f" pushdown: {pushdown_time * 1000:10.1f} ms {pushed}")
+    print(f"streaming: {streaming_time * 1000:10.1f} ms {streamed}")
+
+
+def bench_bulk_load(workers=4, rows_per_statement=1000):
+    """Seed user_data.csv with the parallel loader and report rows/s."""
+    stats = bulk_load("user_data.csv", workers=workers, rows_per_statement=rows_per_statement)
+    print(f"{stats['rows']} rows in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_sec']:.0f} rows/s, {stats['commits']} commits)")
+
+
+def bench_csv_reader(rows=500_000, batch_size=1000):
+    """Read a generated CSV with DictReader batches vs memory-mapped batches."""
+    with open("user_data.csv", encoding="utf-8") as f:
+        header, *lines = f.read().splitlines()
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as out:
+            out.write(header + "\n")
+            for i in range(rows):
+                out.write(lines[i % len(lines)] + "\n")
+
+        def consume(memory_map):
+            count = 0
+            for batch in seed.read_csv_in_batches(path, batch_size, memory_map):
+                for _name, _email, _age in seed._user_fields(batch):
+                    count += 1
+            return count
+
+        for memory_map in (False, True):
+            elapsed, count = _timed(consume, memory_map, repeat=1)
+            tracemalloc.start()
+            consume(memory_map)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            label = "mmap" if memory_map else "DictReader"
+            print(f"{label:>10}: {count} rows in {elapsed * 1000:8.1f} ms, "
+                  f"peak {peak / 1024:8.1f} KiB")
+    finally:
+        os.remove(path)
+
+
+def bench_partitioned_scan(partitions=4):
+    """Full-table read: one sequential stream vs a partitioned scan."""
+    stream_users = __import__('0-stream_users').stream_users
+    sequential_time, rows = _timed(lambda: sum(1 for _ in stream_users()), repeat=1)
+    parallel_time, parallel_rows = _timed(
+        lambda: sum(1 for _ in partitioned_scan(partitions)), repeat=1
+    )
+    print(f"sequential: {rows} rows in {sequential_time * 1000:8.1f} ms")
+    print(f"partitions={partitions}: {parallel_rows} rows in {parallel_time * 1000:8.1f} ms")
+
+
+def bench_async_streams(streams=8):
+    """Consume `streams` concurrent full-table streams: threads vs asyncio."""
+    import async_streams
+    stream_users = __import__('0-stream_users').stream_users
+
+    def threaded():
+        counts = []
+        workers = [
+            threading.Thread(target=lambda: counts.append(sum(1 for _ in stream_users())))
+            for _ in range(streams)
+        ]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return sum(counts)
+
+    async def consume():
+        count = 0
+        async for _ in async_streams.stream_users():
+            count += 1
+        return count
+
+    async def concurrent():
+        try:
+            return sum(await asyncio.gather(*(consume() for _ in range(streams))))
+        finally:
+            await async_streams.close_pool()
+
+    thread_time, thread_rows = _timed(threaded, repeat=1)
+    async_time, async_rows = _timed(lambda: asyncio.run(concurrent()), repeat=1)
+    print(f"threads: {thread_rows / thread_time:12.0f} rows/s")
+    print(f"  async: {async_rows / async_time:12.0f} rows/s")
+
+
+def bench_stream_ops(rows=1_000_000):
+    """Per-operator cost of Stream pipelines against hand-written loops."""
+    columns = ("user_id", "name", "email", "age")
+    users = [dict(zip(columns, row)) for row in _synthetic_rows(rows)]
+
+    def loop_filter_map():
+        return [u["email"] for u in users if u["age"] > 25]
+
+    def loop_dedupe():
+        seen = set()
+        out = []
+        for u in users:
+            if u["name"] not in seen:
+                seen.add(u["name"])
+                out.append(u)
+        return out
+
+    def loop_batch():
+        return [users[i:i + 100] for i in range(0, len(users), 100)]
+
+    cases = {
+        "map": (lambda: Stream(users).map(lambda u: u["age"]).count(),
+                lambda: len([u["age"] for u in users])),
+        "filter": (lambda: Stream(users).filter(lambda u: u["age"] > 25).count(),
+                   lambda: len([u for u in users if u["age"] > 25])),
+        "filter+map": (
+            lambda: Stream(users).filter(lambda u: u["age"] > 25)
+                                 .map(lambda u: u["email"]).count(),
+            lambda: len(loop_filter_map())),
+        "dedupe": (lambda: Stream(users).dedupe(lambda u: u["name"]).count(),
+                   lambda: len(loop_dedupe())),
+        "take": (lambda: Stream(users).take(rows // 2).count(),
+                 lambda: len(users[:rows // 2])),
+        "batch": (lambda: Stream(users).batch(100).count(),
+                  lambda: len(loop_batch())),
+        "window": (lambda: Stream(users).window(3).count(),
+                   lambda: len(list(zip(users, users[1:], users[2:])))),
+        "group_by": (lambda: Stream(users).group_by(lambda u: u["age"] // 10).count(),
+                     lambda: len({u["age"] // 10 for u in users})),
+    }
+    print(f"{'operator':>20} {'stream ms':>10} {'loop ms':>10}")
+    for name, (stream_case, loop_case) in cases.items():
+        stream_time, _ = _timed(stream_case, repeat=3)
+        loop_time, _ = _timed(loop_case, repeat=3)
+        print(f"{name:>20} {stream_time * 1000:>10.1f} {loop_time * 1000:>10.1f}")
+
+
+BENCHMARKS = {
+    "pagination": bench_pagination,
+    "pool": bench_pool,
+    "columnar": bench_columnar,
+    "aggregates": bench_aggregates,
+    "bulk_load": bench_bulk_load,
+    "csv_reader": bench_csv_reader,
+    "partitioned_scan": bench_partitioned_scan,
+    "async_streams": bench_async_streams,
+    "stream_ops": bench_stream_ops,
+}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print(f"Usage: {sys.argv[0]} <{'|'.join(BENCHMARKS)}> [args...]")
+        sys.exit(1)
+    BENCHMARKS[sys.argv[1]](*(int(arg) for arg in sys.argv[2:]))
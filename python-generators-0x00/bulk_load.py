@@ -0,0 +1,185 @@
+"""
+Parallel bulk loader for user_data.
+
+A producer thread parses the CSV into row tuples while `workers` threads,
+each with its own connection, insert them with multi-row VALUES
+statements and commit whenever a row or byte budget is reached.
+For a single-connection alternative, method="infile" hands the whole file
+to the server with LOAD DATA LOCAL INFILE.
+"""
+import csv
+import os
+import queue
+import tempfile
+import threading
+import time
+
+import seed
+from channels import DONE, put
+
+_INSERT_PREFIX = "INSERT IGNORE INTO user_data (user_id, name, email, age) VALUES "
+_ROW_PLACEHOLDER = "(%s, %s, %s, %s)"
+
+_LOAD_DATA = """
+    LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE user_data
+    FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+    LINES TERMINATED BY '\\n'
+    (user_id, name, email, age)
+"""
+
+
+def _row_bytes(row):
+    return sum(len(value) for value in row) + 16
+
+
+def _produce(csv_file, rows_per_statement, batches, stop, errors):
+    try:
+        for batch in seed.read_csv_in_batches(csv_file, rows_per_statement):
+            rows = [
+                (seed.user_id_for(row['email']), row['name'], row['email'], row['age'])
+                for row in batch
+            ]
+            if not put(batches, rows, stop.is_set):
+                return
+    except BaseException as e:
+        errors.append(e)
+        stop.set()
+
+
+def _consume(connect, batches, commit_rows, commit_bytes, totals, lock, stop, errors):
+    connection = None
+    try:
+        connection = connect()
+        cursor = connection.cursor()
+        pending_rows = pending_bytes = 0
+        statements = {}
+        while True:
+            rows = batches.get()
+            if rows is DONE:
+                break
+            if stop.is_set():
+                continue
+            statement = statements.get(len(rows))
+            if statement is None:
+                statement = _INSERT_PREFIX + ", ".join([_ROW_PLACEHOLDER] * len(rows))
+                statements[len(rows)] = statement
+            cursor.execute(statement, [value for row in rows for value in row])
+            pending_rows += len(rows)
+            pending_bytes += sum(_row_bytes(row) for row in rows)
+            if pending_rows >= commit_rows or pending_bytes >= commit_bytes:
+                connection.commit()
+                with lock:
+                    totals["rows"] += pending_rows
+                    totals["commits"] += 1
+                pending_rows = pending_bytes = 0
+        if pending_rows and not stop.is_set():
+            connection.commit()
+            with lock:
+                totals["rows"] += pending_rows
+                totals["commits"] += 1
+        cursor.close()
+    except BaseException as e:
+        errors.append(e)
+        stop.set()
+    finally:
+        if connection is not None:
+            connection.close()
+
+
+def _with_user_ids(csv_file, out):
+    """Copy the CSV rows to `out`, headerless, with seed.user_id_for() prepended."""
+    writer = csv.writer(out, lineterminator="\n")
+    for batch in seed.read_csv_in_batches(csv_file, 10000):
+        writer.writerows(
+            (seed.user_id_for(row['email']), row['name'], row['email'], row['age'])
+            for row in batch
+        )
+
+
+def load_infile(csv_file, connect=None):
+    """
+    Load the CSV with one LOAD DATA LOCAL INFILE statement. The ids are
+    computed in Python first (into a temporary copy of the file), since
+    the server has no UUIDv5 function.
+    """
+    if connect is None:
+        def connect():
+            return seed.open_prodev_connection(allow_local_infile=True)
+    start = time.perf_counter()
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", newline="", encoding="utf-8",
+                                     delete=False) as staged:
+        _with_user_ids(csv_file, staged)
+    try:
+        connection = connect()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(_LOAD_DATA, (staged.name,))
+            rows = cursor.rowcount
+            connection.commit()
+            cursor.close()
+        finally:
+            connection.close()
+    finally:
+        os.unlink(staged.name)
+    elapsed = time.perf_counter() - start
+    return {"rows": rows, "commits": 1, "seconds": elapsed,
+            "rows_per_sec": rows / elapsed if elapsed else 0.0}
+
+
+def bulk_load(csv_file, workers=4, rows_per_statement=1000, commit_rows=10000,
+              commit_bytes=4 * 1024 * 1024, method="values", connect=None):
+    """
+    Load `csv_file` into user_data and return a stats dict with
+    rows, commits, seconds and rows_per_sec.
+
+    workers:            number of inserting threads, one connection each
+    rows_per_statement: rows per multi-row INSERT statement
+    commit_rows:        commit once this many rows are pending on a worker
+    commit_bytes:       ... or once this many bytes of values are pending
+    method:             "values" for parallel INSERTs, "infile" for LOAD DATA
+    connect:            callable opening a dedicated connection
+    """
+    if method == "infile":
+        return load_infile(csv_file, connect)
+    if method != "values":
+        raise ValueError(f"Unknown load method: {method!r}")
+    if connect is None:
+        connect = seed.open_prodev_connection
+
+    start = time.perf_counter()
+    batches = queue.Queue(maxsize=workers * 2)
+    stop = threading.Event()
+    lock = threading.Lock()
+    errors = []
+    totals = {"rows": 0, "commits": 0}
+
+    producer = threading.Thread(
+        target=_produce, args=(csv_file, rows_per_statement, batches, stop, errors),
+        name="bulk_load-producer", daemon=True
+    )
+    consumers = [
+        threading.Thread(
+            target=_consume,
+            args=(connect, batches, commit_rows, commit_bytes, totals, lock, stop, errors),
+            name=f"bulk_load-worker-{i}", daemon=True
+        )
+        for i in range(workers)
+    ]
+    producer.start()
+    for consumer in consumers:
+        consumer.start()
+    producer.join()
+    def finished():
+        return not any(consumer.is_alive() for consumer in consumers)
+
+    for _ in consumers:
+        put(batches, DONE, finished)
+    for consumer in consumers:
+        consumer.join()
+
+    if errors:
+        raise errors[0]
+    elapsed = time.perf_counter() - start
+    totals["seconds"] = elapsed
+    totals["rows_per_sec"] = totals["rows"] / elapsed if elapsed else 0.0
+    return totals
@@ -0,0 +1,149 @@
+"""
+Incremental change stream over user_data.
+
+Rows carry an updated_at timestamp (maintained by MySQL on every insert
+and update) and the stream keeps a high-water mark of the last
+(updated_at, user_id) it delivered, so a periodic job only reads rows
+changed since its previous run. Deleted rows are not reported.
+
+updated_at is stamped when a statement runs, not when its transaction
+commits, so a long transaction can commit rows below a mark that has
+already moved past them. consume_changes() therefore re-reads the last
+`overlap` seconds below its mark on every run and drops the rows it
+already delivered (their keys are kept in change_stream_delivered).
+Rows are only missed if a write transaction stays open longer than
+`overlap`.
+
+    for batch in consume_changes("nightly-export"):
+        handle(batch)
+"""
+from datetime import datetime, timedelta
+
+import seed
+from checkpoints import create_checkpoint_table, load_checkpoint, save_checkpoint
+from schema import select_list
+
+
+def encode_mark(mark):
+    updated_at, user_id = mark
+    return f"{updated_at.isoformat()}|{user_id}"
+
+
+def decode_mark(position):
+    if not position:
+        return None
+    updated_at, _, user_id = position.partition("|")
+    return datetime.fromisoformat(updated_at), user_id
+
+
+def read_changes(connection, since=None, batch_size=1000, lag=1.0, columns=None):
+    """
+    Yield batches of row dicts changed after the `since` mark, in
+    (updated_at, user_id) order. Rows newer than `lag` seconds are left
+    for the next run. On its own this can skip rows committed more than
+    `lag` seconds after their statement ran; consume_changes() covers
+    that with its overlap window.
+    """
+    if columns is not None:
+        columns = tuple(columns) + tuple(
+            name for name in ("updated_at", "user_id") if name not in columns
+        )
+    projection = select_list(connection, columns)
+    cursor = connection.cursor(dictionary=True)
+    try:
+        while True:
+            params = [lag]
+            sql = (f"SELECT {projection} FROM user_data "
+                   "WHERE updated_at <= NOW(6) - INTERVAL %s SECOND")
+            if since is not None:
+                sql += " AND (updated_at > %s OR (updated_at = %s AND user_id > %s))"
+                params += [since[0], since[0], since[1]]
+            sql += " ORDER BY updated_at, user_id LIMIT %s"
+            params.append(batch_size)
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+            if not rows:
+                return
+            yield rows
+            if len(rows) < batch_size:
+                return
+            since = (rows[-1]["updated_at"], rows[-1]["user_id"])
+    finally:
+        cursor.close()
+
+
+def create_delivered_table(connection):
+    cursor = connection.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS change_stream_delivered (
+            name VARCHAR(255) NOT NULL,
+            user_id CHAR(36) NOT NULL,
+            updated_at TIMESTAMP(6) NOT NULL,
+            PRIMARY KEY (name, updated_at, user_id)
+        );
+    """)
+    cursor.close()
+
+
+def _load_delivered(connection, name):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            "SELECT user_id, updated_at FROM change_stream_delivered WHERE name = %s", (name,)
+        )
+        return set(cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def _record_delivered(cursor, name, rows, mark, overlap):
+    cursor.executemany(
+        "INSERT IGNORE INTO change_stream_delivered (name, user_id, updated_at) "
+        "VALUES (%s, %s, %s)",
+        [(name, row["user_id"], row["updated_at"]) for row in rows]
+    )
+    cursor.execute(
+        "DELETE FROM change_stream_delivered WHERE name = %s AND updated_at < %s",
+        (name, mark[0] - timedelta(seconds=overlap))
+    )
+
+
+def consume_changes(name, batch_size=1000, lag=1.0, columns=None, overlap=300.0):
+    """
+    Yield batches changed since the checkpoint stored under `name`. A
+    batch's mark is saved once the consumer asks for the next batch (or
+    finishes), so delivery is at-least-once.
+
+    overlap: seconds below the saved mark that are read again to pick up
+             rows whose transaction committed after the mark passed them;
+             must exceed the longest write transaction
+    """
+    connection = seed.connect_to_prodev()
+    try:
+        create_checkpoint_table(connection)
+        create_delivered_table(connection)
+        mark = decode_mark(load_checkpoint(connection, name))
+        delivered = _load_delivered(connection, name) if mark is not None else set()
+        since = None
+        if mark is not None:
+            # Everything from mark - overlap onwards (user_id > "" admits all ids).
+            since = (mark[0] - timedelta(seconds=overlap), "")
+        reader = seed.connect_to_prodev()
+        try:
+            for rows in read_changes(reader, since, batch_size, lag, columns):
+                last = (rows[-1]["updated_at"], rows[-1]["user_id"])
+                rows = [row for row in rows
+                        if (row["user_id"], row["updated_at"]) not in delivered]
+                if not rows:
+                    continue
+                yield rows
+                mark = last if mark is None else max(mark, last)
+                cursor = connection.cursor()
+                save_checkpoint(cursor, name, encode_mark(mark))
+                _record_delivered(cursor, name, rows, mark, overlap)
+                connection.commit()
+                cursor.close()
+        finally:
+            reader.close()
+    finally:
+        connection.close()
@@ -0,0 +1,26 @@
+"""
+Hand-off between a reader thread and the generator draining it.
+
+Producers put batches on a bounded queue.Queue and finish with DONE (or
+the exception that stopped them). put() waits in short slices so a
+producer blocked on a full queue notices when the consumer has gone away
+instead of hanging forever.
+"""
+import queue
+
+DONE = object()
+
+
+def put(channel, item, stopped, timeout=0.1):
+    """
+    Put `item` on `channel`, retrying while it is full. `stopped` is a
+    callable checked between attempts; returns False if it became true
+    before the item was queued.
+    """
+    while not stopped():
+        try:
+            channel.put(item, timeout=timeout)
+            return True
+        except queue.Full:
+            continue
+    return False
@@ -0,0 +1,46 @@
+"""
+Named progress markers stored next to the data they describe.
+
+save_checkpoint() only executes the upsert; callers commit it in the same
+transaction as the work it records, so a crash can never leave the
+checkpoint ahead of (or behind) the data.
+"""
+
+
+def create_checkpoint_table(connection):
+    cursor = connection.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS checkpoints (
+            name VARCHAR(255) PRIMARY KEY,
+            position VARCHAR(255) NOT NULL,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                ON UPDATE CURRENT_TIMESTAMP
+        );
+    """)
+    cursor.close()
+
+
+def load_checkpoint(connection, name):
+    """Return the stored position for `name`, or None."""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT position FROM checkpoints WHERE name = %s", (name,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    finally:
+        cursor.close()
+
+
+def save_checkpoint(cursor, name, position):
+    cursor.execute(
+        "INSERT INTO checkpoints (name, position) VALUES (%s, %s) "
+        "ON DUPLICATE KEY UPDATE position = VALUES(position)",
+        (name, str(position))
+    )
+
+
+def clear_checkpoint(connection, name):
+    cursor = connection.cursor()
+    cursor.execute("DELETE FROM checkpoints WHERE name = %s", (name,))
+    connection.commit()
+    cursor.close()
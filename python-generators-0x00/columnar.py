@@ -0,0 +1,124 @@
+"""
+Column-oriented batches of user_data rows.
+
+Numeric columns are packed into array('d') and string columns into lists of
+interned strings; when NumPy is installed both become NumPy arrays, so a
+filter over a whole batch is one vectorized comparison and one masked copy
+per column instead of a per-row loop.
+"""
+import operator
+import sys
+from array import array
+from decimal import Decimal
+from functools import partial
+from itertools import compress
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NUMERIC_COLUMNS = frozenset({"age"})
+
+_OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+# `column <op> value` rewritten as `value <reflected op> column`, so the
+# comparison can be bound with partial() and mapped in C.
+_REFLECTED = {
+    "<": operator.gt,
+    "<=": operator.ge,
+    ">": operator.lt,
+    ">=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+def _numeric(values):
+    packed = array("d", (float(v) for v in values))
+    if np is not None:
+        return np.frombuffer(packed, dtype=np.float64)
+    return packed
+
+
+def _strings(values):
+    intern = sys.intern
+    interned = [intern(v) if isinstance(v, str) else v for v in values]
+    if np is not None:
+        column = np.empty(len(interned), dtype=object)
+        column[:] = interned
+        return column
+    return interned
+
+
+class UserBatch:
+    def __init__(self, columns, data):
+        """columns: ordered column names; data: name -> column sequence."""
+        self.columns = tuple(columns)
+        self.data = data
+
+    @classmethod
+    def from_rows(cls, columns, rows):
+        """Build a batch from row tuples in `columns` order."""
+        columns = tuple(columns)
+        values = list(zip(*rows)) if rows else [() for _ in columns]
+        return cls.from_columns(dict(zip(columns, values)))
+
+    @classmethod
+    def from_columns(cls, columns):
+        """Build a batch from a name -> sequence of values mapping."""
+        data = {}
+        for name, column in columns.items():
+            if name in NUMERIC_COLUMNS or (
+                len(column) and isinstance(column[0], (int, float, Decimal))
+            ):
+                data[name] = _numeric(column)
+            else:
+                data[name] = _strings(column)
+        return cls(tuple(columns), data)
+
+    def __len__(self):
+        return len(self.data[self.columns[0]]) if self.columns else 0
+
+    def __getitem__(self, name):
+        return self.data[name]
+
+    def __iter__(self):
+        """Yield rows as dicts, for code written against row batches."""
+        names = self.columns
+        for values in zip(*(self.data[name] for name in names)):
+            yield dict(zip(names, values))
+
+    def mask(self, name, op, value):
+        """Boolean mask of rows where `column <op> value`."""
+        column = self.data[name]
+        if np is not None and isinstance(column, np.ndarray):
+            return _OPERATORS[op](column, value)
+        return list(map(partial(_REFLECTED[op], value), column))
+
+    def take(self, mask):
+        """Return a new batch with only the rows selected by `mask`."""
+        if np is not None:
+            np_mask = np.asarray(mask, dtype=bool)
+            if not all(isinstance(self.data[name], np.ndarray) for name in self.columns):
+                mask = np_mask.tolist()
+        data = {}
+        for name in self.columns:
+            column = self.data[name]
+            if np is not None and isinstance(column, np.ndarray):
+                data[name] = column[np_mask]
+            elif isinstance(column, array):
+                data[name] = array(column.typecode, compress(column, mask))
+            else:
+                data[name] = list(compress(column, mask))
+        return UserBatch(self.columns, data)
+
+    def filter(self, name, op, value):
+        return self.take(self.mask(name, op, value))
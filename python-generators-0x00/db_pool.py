@@ -0,0 +1,204 @@
+"""
+Bounded, thread-safe database connection pool.
+
+Connections come from a `factory` callable and are handed out wrapped in
+a PooledConnection, whose close() returns the connection to the pool, so
+code written against a plain connection keeps working unchanged.
+"""
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be borrowed within the timeout."""
+
+
+class _Entry:
+    __slots__ = ("raw", "created_at", "last_used")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = self.last_used = time.monotonic()
+
+
+class PooledConnection:
+    """Borrowed connection; close() hands it back to its pool."""
+
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+
+    def __getattr__(self, name):
+        entry = self.__dict__.get("_entry")
+        if entry is None:
+            raise AttributeError(f"Connection already returned to the pool ({name})")
+        return getattr(entry.raw, name)
+
+    @property
+    def raw(self):
+        return self._entry.raw
+
+    def close(self):
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool.release(entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def _default_health_check(raw):
+    is_connected = getattr(raw, "is_connected", None)
+    return is_connected() if is_connected else True
+
+
+def _default_reset(raw):
+    if getattr(raw, "in_transaction", False):
+        raw.rollback()
+
+
+class ConnectionPool:
+    def __init__(self, factory, size=5, idle_timeout=300, max_lifetime=1800,
+                 acquire_timeout=30, health_check=_default_health_check,
+                 reset=_default_reset):
+        """
+        factory:         zero-argument callable opening a new connection
+        size:            maximum number of open connections
+        idle_timeout:    seconds an idle connection may sit before it is dropped
+        max_lifetime:    seconds after which a connection is always recycled
+        acquire_timeout: seconds acquire() waits for a free slot
+        health_check:    callable(raw) -> bool run on every borrow, or None
+        reset:           callable(raw) run on release, e.g. to roll back
+        """
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.factory = factory
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.acquire_timeout = acquire_timeout
+        self.health_check = health_check
+        self.reset = reset
+        self._idle = deque()
+        self._open = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {
+            "borrows": 0,
+            "created": 0,
+            "discarded": 0,
+            "health_check_failures": 0,
+            "timeouts": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    def _expired(self, entry, now):
+        return (now - entry.created_at > self.max_lifetime
+                or now - entry.last_used > self.idle_timeout)
+
+    def _discard(self, entry):
+        with self._cond:
+            self._open -= 1
+            self._stats["discarded"] += 1
+            self._cond.notify()
+        try:
+            entry.raw.close()
+        except Exception:
+            pass
+
+    def _take(self, deadline):
+        """Pop an idle entry, or reserve a slot (returns None) for a new one."""
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._open < self.size:
+                    self._open += 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"No connection available after {self.acquire_timeout}s"
+                    )
+                self._cond.wait(remaining)
+
+    def acquire(self):
+        start = time.monotonic()
+        deadline = start + self.acquire_timeout
+        while True:
+            entry = self._take(deadline)
+            if entry is None:
+                try:
+                    entry = _Entry(self.factory())
+                except BaseException:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats["created"] += 1
+                break
+            if self._expired(entry, time.monotonic()):
+                self._discard(entry)
+                continue
+            if self.health_check is not None:
+                try:
+                    healthy = self.health_check(entry.raw)
+                except Exception:
+                    healthy = False
+                if not healthy:
+                    with self._cond:
+                        self._stats["health_check_failures"] += 1
+                    self._discard(entry)
+                    continue
+            break
+        waited = time.monotonic() - start
+        with self._cond:
+            self._stats["borrows"] += 1
+            self._stats["wait_time_total"] += waited
+            self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+        return PooledConnection(self, entry)
+
+    def release(self, entry):
+        now = time.monotonic()
+        try:
+            if self.reset is not None:
+                self.reset(entry.raw)
+        except Exception:
+            self._discard(entry)
+            return
+        if self._closed or now - entry.created_at > self.max_lifetime:
+            self._discard(entry)
+            return
+        entry.last_used = now
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def close(self):
+        """Close idle connections; borrowed ones are closed as they come back."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+        for entry in idle:
+            self._discard(entry)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["open"] = self._open
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._open - len(self._idle)
+        borrows = stats["borrows"]
+        stats["wait_time_avg"] = stats["wait_time_total"] / borrows if borrows else 0.0
+        stats["churn"] = stats["discarded"]
+        return stats
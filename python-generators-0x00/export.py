@@ -0,0 +1,160 @@
+"""
+Bulk export of user_data to compressed columnar files, and a reader that
+feeds the batch pipeline straight from those files.
+
+Each batch from stream_users_in_batches(columnar=True) becomes one chunk:
+a Parquet row group when pyarrow is installed (.parquet), otherwise one
+JSON line of column arrays in a zstd (.ndjson.zst, needs zstandard) or
+gzip (.ndjson.gz) stream. Only one batch is held in memory at a time.
+
+    export_users("users.parquet")
+    for batch in read_export("users.parquet"):
+        adults = (Col("age") > 25).filter(batch)
+"""
+import gzip
+import io
+import json
+from array import array
+from datetime import datetime
+
+from columnar import UserBatch
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+batch_processing = __import__('1-batch_processing')
+
+
+def default_path(stem="user_data"):
+    if pq is not None:
+        return f"{stem}.parquet"
+    if zstandard is not None:
+        return f"{stem}.ndjson.zst"
+    return f"{stem}.ndjson.gz"
+
+
+def _column_type(column):
+    for value in column:
+        if isinstance(value, datetime):
+            return "datetime"
+        if isinstance(value, float):
+            return "float"
+        if value is not None:
+            return "str"
+    return "str"
+
+
+def _to_json(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _open_ndjson(path, mode):
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("Reading or writing .zst files requires the zstandard package")
+        raw = open(path, mode + "b")
+        if mode == "w":
+            stream = zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    raise ValueError(f"Unknown export format for {path!r}")
+
+
+def _arrow_column(column):
+    if isinstance(column, array):
+        return pa.array(column.tolist(), type=pa.float64())
+    return pa.array(column)
+
+
+def _write_parquet(path, batches):
+    writer = None
+    rows = 0
+    try:
+        for batch in batches:
+            table = pa.table({name: _arrow_column(batch[name]) for name in batch.columns})
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+            writer.write_table(table)
+            rows += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def _write_ndjson(path, batches):
+    rows = 0
+    with _open_ndjson(path, "w") as out:
+        for batch in batches:
+            columns = {name: batch[name] for name in batch.columns}
+            types = {name: _column_type(column) for name, column in columns.items()}
+            record = {
+                "types": types,
+                "columns": {
+                    name: [_to_json(value) for value in column]
+                    if types[name] == "datetime" else list(column)
+                    for name, column in columns.items()
+                },
+            }
+            out.write(json.dumps(record, separators=(",", ":"), default=float))
+            out.write("\n")
+            rows += len(batch)
+    return rows
+
+
+def export_users(path=None, batch_size=10000, batches=None):
+    """
+    Write user_data (or any iterable of UserBatch `batches`) to `path`
+    and return the number of rows written.
+    """
+    path = path or default_path()
+    if batches is None:
+        batches = batch_processing.stream_users_in_batches(batch_size, columnar=True)
+    if path.endswith(".parquet"):
+        if pq is None:
+            raise RuntimeError("Writing .parquet files requires pyarrow")
+        return _write_parquet(path, batches)
+    return _write_ndjson(path, batches)
+
+
+def _read_parquet(path):
+    parquet = pq.ParquetFile(path)
+    for index in range(parquet.num_row_groups):
+        table = parquet.read_row_group(index)
+        yield UserBatch.from_columns(
+            {name: table.column(name).to_pylist() for name in table.column_names}
+        )
+
+
+def _read_ndjson(path):
+    with _open_ndjson(path, "r") as lines:
+        for line in lines:
+            record = json.loads(line)
+            columns = record["columns"]
+            for name, kind in record["types"].items():
+                if kind == "datetime":
+                    columns[name] = [
+                        datetime.fromisoformat(value) if value else value
+                        for value in columns[name]
+                    ]
+            yield UserBatch.from_columns(columns)
+
+
+def read_export(path):
+    """Yield UserBatch objects, one per exported chunk."""
+    if path.endswith(".parquet"):
+        if pq is None:
+            raise RuntimeError("Reading .parquet files requires pyarrow")
+        return _read_parquet(path)
+    return _read_ndjson(path)
@@ -0,0 +1,109 @@
+"""
+Memory-mapped CSV reader.
+
+read_batches() maps the file, cuts it into batches on record byte offsets
+and yields ColumnBatch objects. A batch keeps its records as one bytes
+block and only decodes and splits it into columns when a column is first
+requested, so there is no dict per row and memory stays flat no matter
+how large the file is.
+"""
+import csv
+import io
+import mmap
+
+
+def _parse(block):
+    """Decode a block of whole records and parse it with the C csv reader."""
+    text = block.decode("utf-8")
+    return [record for record in csv.reader(io.StringIO(text, newline="")) if record]
+
+
+class ColumnBatch:
+    def __init__(self, header, block, start, end):
+        """
+        header: column names
+        block:  raw bytes of the batch's records
+        start:  byte offset of the first record in the file
+        end:    byte offset just past the last record
+        """
+        self.header = header
+        self.start = start
+        self.end = end
+        self._block = block
+        self._columns = None
+
+    def _split(self):
+        if self._columns is None:
+            records = _parse(self._block)
+            columns = zip(*records) if records else [() for _ in self.header]
+            self._columns = dict(zip(self.header, columns))
+            self._block = None
+        return self._columns
+
+    def column(self, name):
+        """Values of one column; the batch is decoded on the first call."""
+        return self._split()[name]
+
+    def rows(self, *names):
+        """Iterate tuples of the given columns (all columns by default)."""
+        return zip(*(self.column(name) for name in names or self.header))
+
+    def __len__(self):
+        return len(self.column(self.header[0])) if self.header else 0
+
+    def __iter__(self):
+        """Yield rows as dicts, like csv.DictReader."""
+        header = self.header
+        for values in self.rows():
+            yield dict(zip(header, values))
+
+
+def _next_batch(mm, pos, batch_size):
+    """
+    Return (end, block): the byte offset just past `batch_size` records
+    starting at `pos`, and those records' bytes. The block is the only
+    copy made of the batch; the quote count runs over it.
+    """
+    size = len(mm)
+    end = pos
+    for _ in range(batch_size):
+        if end >= size:
+            break
+        newline = mm.find(b"\n", end)
+        end = size if newline == -1 else newline + 1
+    block = mm[pos:end]
+    quotes = block.count(b'"')
+    if quotes % 2 == 0:
+        return end, block
+    # A newline inside a quoted field must not end the batch; only the
+    # extra lines are copied while looking for the closing quote.
+    parts = [block]
+    while quotes % 2 and end < size:
+        newline = mm.find(b"\n", end)
+        line_end = size if newline == -1 else newline + 1
+        parts.append(mm[end:line_end])
+        quotes += parts[-1].count(b'"')
+        end = line_end
+    return end, b"".join(parts)
+
+
+def read_batches(csv_file, batch_size=100, start=None):
+    """
+    Yield ColumnBatch objects of up to `batch_size` records. `start` is a
+    record byte offset (e.g. a previous batch's `end`) to resume from.
+    """
+    with open(csv_file, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return
+        with mm:
+            pos, first = _next_batch(mm, 0, 1)
+            header = tuple(next(csv.reader([first.decode("utf-8-sig")]), ()))
+            if start is not None:
+                pos = max(pos, start)
+            size = len(mm)
+            while pos < size:
+                end, block = _next_batch(mm, pos, batch_size)
+                yield ColumnBatch(header, block, pos, end)
+                pos = end
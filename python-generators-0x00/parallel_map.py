@@ -0,0 +1,67 @@
+"""
+Process-pool map stage for the batch pipeline.
+
+    batches = stream_users_in_batches(1000)
+    for enriched in parallel_map(enrich_user, batches, workers=4):
+        ...
+
+Whole batches are shipped to worker processes, so the pickling and IPC
+cost is paid per batch rather than per row. At most `max_in_flight`
+batches are submitted at once, which bounds memory and applies
+backpressure to the source generator.
+"""
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+
+def _apply(func, batch, per_batch):
+    if per_batch:
+        return func(batch)
+    return [func(row) for row in batch]
+
+
+def parallel_map(func, batches, workers=None, max_in_flight=None, ordered=True,
+                 per_batch=False):
+    """
+    Yield func applied to every batch from `batches`, computed in a
+    process pool.
+
+    func:          picklable top-level function, called per row (or per
+                   batch when `per_batch` is True)
+    workers:       worker processes, default os.cpu_count()
+    max_in_flight: batches submitted but not yet yielded, default 2 * workers
+    ordered:       yield results in input order; otherwise as they finish
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+    source = iter(batches)
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending = deque()
+
+    def submit():
+        for batch in source:
+            pending.append(executor.submit(_apply, func, batch, per_batch))
+            return True
+        return False
+
+    try:
+        while len(pending) < max_in_flight and submit():
+            pass
+        while pending:
+            if ordered:
+                result = pending.popleft().result()
+                submit()
+                yield result
+                continue
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+            results = [future.result() for future in done]
+            while len(pending) < max_in_flight and submit():
+                pass
+            yield from results
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,151 @@
+"""
+Parallel, range-partitioned scans of user_data.
+
+The user_id key space is split into contiguous ranges and every range is
+read over its own connection. partitioned_scan() streams the rows back
+from a thread per range, either as they arrive or in key order;
+partitioned_map() runs a function over each range in a process pool for
+CPU-heavy full-table jobs.
+"""
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import seed
+from channels import DONE, put
+
+
+def uuid_ranges(partitions):
+    """
+    Split the textual UUID key space into `partitions` contiguous
+    [low, high) ranges; None means unbounded. user_ids are UUIDs, so
+    rows spread evenly over these ranges.
+    """
+    if partitions < 1:
+        raise ValueError("partitions must be at least 1")
+    span = 16 ** 8
+    bounds = [None]
+    for i in range(1, partitions):
+        bounds.append(f"{span * i // partitions:08x}-0000-0000-0000-000000000000")
+    bounds.append(None)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _range_query(low, high, where):
+    conditions = []
+    params = []
+    if low is not None:
+        conditions.append("user_id >= %s")
+        params.append(low)
+    if high is not None:
+        conditions.append("user_id < %s")
+        params.append(high)
+    if where is not None:
+        clause, where_params = where.to_sql()
+        conditions.append(clause)
+        params.extend(where_params)
+    sql = "SELECT * FROM user_data"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    return sql + " ORDER BY user_id", params
+
+
+def scan_range(low, high, where=None, batch_size=1000, connect=None):
+    """
+    Yield lists of row dicts for user_ids in [low, high). `connect`
+    defaults to borrowing from the shared pool.
+    """
+    connection = connect() if connect else seed.get_pool().acquire()
+    cursor = None
+    try:
+        cursor = connection.cursor(dictionary=True)
+        sql, params = _range_query(low, high, where)
+        cursor.execute(sql, params or None)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        if cursor is not None:
+            cursor.close()
+        connection.close()
+
+
+def _feed(channel, stop, low, high, where, batch_size, connect):
+    try:
+        for rows in scan_range(low, high, where, batch_size, connect):
+            if not put(channel, rows, stop.is_set):
+                return
+        put(channel, DONE, stop.is_set)
+    except BaseException as e:
+        put(channel, e, stop.is_set)
+
+
+def partitioned_scan(partitions=4, ordered=False, where=None, batch_size=1000,
+                     buffered_batches=4, ranges=None, connect=None):
+    """
+    Yield user rows read in parallel, one thread and connection per range.
+
+    ordered:          yield rows in user_id order (ranges are drained one
+                      after another while later ranges keep prefetching)
+                      instead of in arrival order
+    buffered_batches: batches each range may hold before its reader blocks
+    ranges:           explicit [(low, high), ...], default uuid_ranges()
+    connect:          callable opening a connection; defaults to a
+                      dedicated one per range so a wide scan cannot
+                      exhaust the shared pool
+    """
+    ranges = ranges or uuid_ranges(partitions)
+    connect = connect or seed.open_prodev_connection
+    stop = threading.Event()
+    if ordered:
+        channels = [queue.Queue(maxsize=buffered_batches) for _ in ranges]
+    else:
+        shared = queue.Queue(maxsize=buffered_batches * len(ranges))
+        channels = [shared] * len(ranges)
+    executor = ThreadPoolExecutor(max_workers=len(ranges),
+                                  thread_name_prefix="partitioned_scan")
+    try:
+        for channel, (low, high) in zip(channels, ranges):
+            executor.submit(_feed, channel, stop, low, high, where, batch_size, connect)
+        if ordered:
+            sources = [(channel, 1) for channel in channels]
+        else:
+            sources = [(shared, len(ranges))]
+        for channel, producers in sources:
+            while producers:
+                item = channel.get()
+                if item is DONE:
+                    producers -= 1
+                    continue
+                if isinstance(item, BaseException):
+                    raise item
+                yield from item
+    finally:
+        stop.set()
+        executor.shutdown(wait=True)
+
+
+def _map_range(func, low, high, where, batch_size):
+    # Never reuse pooled sockets inherited from the parent process.
+    batches = scan_range(low, high, where, batch_size, seed.open_prodev_connection)
+    rows = (row for batch in batches for row in batch)
+    return func(rows)
+
+
+def partitioned_map(func, partitions=None, where=None, batch_size=1000, ranges=None):
+    """
+    Run `func(rows)` over every range in its own process and return the
+    per-range results in key order. `func` must be a picklable top-level
+    function; each worker process opens its own connection.
+    """
+    if ranges is None:
+        ranges = uuid_ranges(partitions or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [
+            executor.submit(_map_range, func, low, high, where, batch_size)
+            for low, high in ranges
+        ]
+        return [future.result() for future in futures]
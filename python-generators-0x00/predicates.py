@@ -0,0 +1,187 @@
+"""
+Small predicate API for the batch pipeline.
+
+    where = (Col("age") > 25) & Col("name").isin(["Ada", "Linus"])
+    clause, params = where.to_sql()   # "(`age` > %s AND `name` IN (%s, %s))"
+    where.evaluate({"age": 30, "name": "Ada"})   # True
+
+Predicates compile to a parameterized WHERE clause for MySQL sources and
+can be evaluated in Python, row by row or as a mask over a UserBatch, for
+any other source.
+"""
+import operator
+import re
+from abc import ABC, abstractmethod
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+_OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+_SQL_OPERATORS = {"==": "=", "!=": "<>"}
+
+
+def quote_identifier(name):
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+    return f"`{name}`"
+
+
+def _combine(left, right, both):
+    if np is not None and isinstance(left, np.ndarray):
+        return left & right if both else left | right
+    if both:
+        return [a and b for a, b in zip(left, right)]
+    return [a or b for a, b in zip(left, right)]
+
+
+class Predicate(ABC):
+    def __and__(self, other):
+        return And(self, other)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+    @abstractmethod
+    def to_sql(self):
+        """Return (clause, params) for a parameterized WHERE clause."""
+
+    @abstractmethod
+    def evaluate(self, row):
+        """Evaluate against one row mapping."""
+
+    @abstractmethod
+    def mask(self, batch):
+        """Boolean mask over a columnar.UserBatch."""
+
+    def filter(self, batch):
+        """Apply to a batch of row dicts or to a UserBatch."""
+        if hasattr(batch, "take"):
+            return batch.take(self.mask(batch))
+        return [row for row in batch if self.evaluate(row)]
+
+
+class Col:
+    """Column reference used to build comparisons."""
+
+    __hash__ = None
+
+    def __init__(self, name):
+        quote_identifier(name)
+        self.name = name
+
+    def __lt__(self, value):
+        return Compare(self.name, "<", value)
+
+    def __le__(self, value):
+        return Compare(self.name, "<=", value)
+
+    def __gt__(self, value):
+        return Compare(self.name, ">", value)
+
+    def __ge__(self, value):
+        return Compare(self.name, ">=", value)
+
+    def __eq__(self, value):
+        return Compare(self.name, "==", value)
+
+    def __ne__(self, value):
+        return Compare(self.name, "!=", value)
+
+    def isin(self, values):
+        return In(self.name, values)
+
+
+class Compare(Predicate):
+    def __init__(self, name, op, value):
+        if op not in _OPERATORS:
+            raise ValueError(f"Unsupported operator: {op!r}")
+        self.name = name
+        self.op = op
+        self.value = value
+
+    def to_sql(self):
+        op = _SQL_OPERATORS.get(self.op, self.op)
+        return f"{quote_identifier(self.name)} {op} %s", [self.value]
+
+    def evaluate(self, row):
+        return _OPERATORS[self.op](row[self.name], self.value)
+
+    def mask(self, batch):
+        return batch.mask(self.name, self.op, self.value)
+
+
+class In(Predicate):
+    def __init__(self, name, values):
+        self.name = name
+        self.values = tuple(values)
+        self._lookup = frozenset(self.values)
+
+    def to_sql(self):
+        if not self.values:
+            return "1 = 0", []
+        placeholders = ", ".join(["%s"] * len(self.values))
+        return f"{quote_identifier(self.name)} IN ({placeholders})", list(self.values)
+
+    def evaluate(self, row):
+        return row[self.name] in self._lookup
+
+    def mask(self, batch):
+        column = batch[self.name]
+        if np is not None and isinstance(column, np.ndarray):
+            return np.isin(column, list(self.values))
+        lookup = self._lookup
+        return [value in lookup for value in column]
+
+
+class And(Predicate):
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+
+    def to_sql(self):
+        left, left_params = self.left.to_sql()
+        right, right_params = self.right.to_sql()
+        return f"({left} AND {right})", left_params + right_params
+
+    def evaluate(self, row):
+        return self.left.evaluate(row) and self.right.evaluate(row)
+
+    def mask(self, batch):
+        return _combine(self.left.mask(batch), self.right.mask(batch), both=True)
+
+
+class Or(Predicate):
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+
+    def to_sql(self):
+        left, left_params = self.left.to_sql()
+        right, right_params = self.right.to_sql()
+        return f"({left} OR {right})", left_params + right_params
+
+    def evaluate(self, row):
+        return self.left.evaluate(row) or self.right.evaluate(row)
+
+    def mask(self, batch):
+        return _combine(self.left.mask(batch), self.right.mask(batch), both=False)
+
+
+def where_clause(predicate):
+    """Return (" WHERE ...", params), or ("", []) for no predicate."""
+    if predicate is None:
+        return "", []
+    clause, params = predicate.to_sql()
+    return f" WHERE {clause}", params
@@ -0,0 +1,50 @@
+"""
+Cached table schema lookups used to build explicit column lists.
+"""
+import threading
+
+from predicates import quote_identifier
+
+_columns = {}
+_lock = threading.Lock()
+
+
+def table_columns(connection, table="user_data"):
+    """Column names of `table` in ordinal order, read once per table."""
+    columns = _columns.get(table)
+    if columns is None:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(
+                "SELECT COLUMN_NAME FROM information_schema.COLUMNS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s "
+                "ORDER BY ORDINAL_POSITION",
+                (table,)
+            )
+            columns = tuple(name for (name,) in cursor.fetchall())
+        finally:
+            cursor.close()
+        with _lock:
+            _columns[table] = columns
+    return columns
+
+
+def clear_schema_cache():
+    with _lock:
+        _columns.clear()
+
+
+def select_list(connection, columns=None, table="user_data"):
+    """
+    Return the SELECT list for `columns`: "*" when None, otherwise the
+    quoted column names after checking them against the table schema.
+    """
+    if columns is None:
+        return "*"
+    if isinstance(columns, str):
+        columns = (columns,)
+    known = table_columns(connection, table)
+    unknown = [name for name in columns if name not in known]
+    if unknown or not columns:
+        raise ValueError(f"Unknown columns for {table}: {unknown or list(columns)}")
+    return ", ".join(quote_identifier(name) for name in columns)
@@ -3,10 +3,24 @@ from mysql.connector import Error
 import csv
 import uuid
 import os
+import threading
 
 from dotenv import load_dotenv
+from db_pool import ConnectionPool
+import mmap_csv
+from checkpoints import create_checkpoint_table, load_checkpoint, save_checkpoint
+from schema import clear_schema_cache
 load_dotenv()
 
+_pool = None
+_pool_lock = threading.Lock()
+
+USER_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_DNS, "user_data.alx_prodev")
+
+def user_id_for(email):
+    """Deterministic user_id, so re-seeding the same row is a no-op."""
+    return str(uuid.uuid5(USER_ID_NAMESPACE, email.strip().lower()))
+
 def connect_db():
     try:
         connection = mysql.connector.connect(
@@ -28,15 +42,36 @@ def create_database(connection):
     except Error as e:
         print(f"Error creating database: {e}")
 
-def connect_to_prodev():
+def open_prodev_connection(**options):
+    return mysql.connector.connect(
+        host=os.getenv("MYSQL_HOST", "localhost"),
+        user=os.getenv("MYSQL_USER", "root"),
+        password=os.getenv("MYSQL_PASSWORD", ""),
+        database=os.getenv("MYSQL_DATABASE", "ALX_prodev"),
+        **options
+    )
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                open_prodev_connection,
+                size=int(os.getenv("MYSQL_POOL_SIZE", "5")),
+                idle_timeout=float(os.getenv("MYSQL_POOL_IDLE_TIMEOUT", "300")),
+                max_lifetime=float(os.getenv("MYSQL_POOL_MAX_LIFETIME", "1800")),
+            )
+        return _pool
+
+def connect_to_prodev(pooled=True):
+    """
+    Return a connection to ALX_prodev, borrowed from the shared pool
+    unless `pooled` is False. close() on a pooled connection returns it.
+    """
     try:
-        connection = mysql.connector.connect(
-            host=os.getenv("MYSQL_HOST", "localhost"),
-            user=os.getenv("MYSQL_USER", "root"),
-            password=os.getenv("MYSQL_PASSWORD", ""),
-            database=os.getenv("MYSQL_DATABASE", "ALX_prodev")
-        )
-        return connection
+        if pooled:
+            return get_pool().acquire()
+        return open_prodev_connection()
     except Error as e:
         print(f"Error connecting to ALX_prodev: {e}")
         return None
@@ -50,15 +85,45 @@ def create_table(connection):
                 name VARCHAR(255) NOT NULL,
                 email VARCHAR(255) NOT NULL UNIQUE,
                 age DECIMAL NOT NULL,
-                INDEX(user_id)
+                updated_at TIMESTAMP(6) NOT NULL
+                    DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+                INDEX(user_id),
+                INDEX(updated_at, user_id)
             );
         """)
         cursor.close()
+        add_updated_at(connection)
         print("Table user_data created successfully")
     except Error as e:
         print(f"Error creating table: {e}")
 
-def read_csv_in_batches(csv_file, batch_size=100):
+def add_updated_at(connection):
+    """Add the updated_at change-tracking column to an older user_data table."""
+    cursor = connection.cursor()
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'user_data' "
+        "AND COLUMN_NAME = 'updated_at'"
+    )
+    (exists,) = cursor.fetchone()
+    if not exists:
+        cursor.execute("""
+            ALTER TABLE user_data
+                ADD COLUMN updated_at TIMESTAMP(6) NOT NULL
+                    DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+                ADD INDEX (updated_at, user_id);
+        """)
+        clear_schema_cache()
+    cursor.close()
+
+def read_csv_in_batches(csv_file, batch_size=100, memory_map=False):
+    """
+    Yield batches of CSV rows as lists of dicts, or as lazily decoded
+    mmap_csv.ColumnBatch objects when `memory_map` is True.
+    """
+    if memory_map:
+        yield from mmap_csv.read_batches(csv_file, batch_size)
+        return
     with open(csv_file, newline="",encoding="utf-8") as f:
         reader = csv.DictReader(f)
         batch=[]
@@ -70,14 +135,19 @@ def read_csv_in_batches(csv_file, batch_size=100):
         if batch: # remaining batches
             yield batch
                         
-def insert_data(connection, csv_file, batch_size=100):
+def _user_fields(batch):
+    if isinstance(batch, mmap_csv.ColumnBatch):
+        return batch.rows('name', 'email', 'age')
+    return ((row['name'], row['email'], row['age']) for row in batch)
+
+def insert_data(connection, csv_file, batch_size=100, memory_map=False):
     try:
         cursor = connection.cursor()
-        for batch in read_csv_in_batches(csv_file, batch_size):            
+        for batch in read_csv_in_batches(csv_file, batch_size, memory_map):
             # Filter out duplicates
             data_to_insert = [
-                (str(uuid.uuid4()), row['name'], row['email'], row['age'])
-                for row in batch
+                (user_id_for(email), name, email, age)
+                for name, email, age in _user_fields(batch)
             ]
             
             if data_to_insert:
@@ -91,4 +161,47 @@ def insert_data(connection, csv_file, batch_size=100):
     except FileNotFoundError:
         print(f"CSV file '{csv_file}' not found")
     except Error as e:
-        print(f"Error inserting data: {e}")
\ No newline at end of file
+        print(f"Error inserting data: {e}")
+
+def insert_data_resumable(connection, csv_file, batch_size=100, checkpoint=None):
+    """
+    Seed from `csv_file`, committing each batch together with the byte
+    offset it ends at, and resume from the last committed offset on the
+    next run. A rerun over a fully loaded file reads nothing.
+    """
+    checkpoint = checkpoint or f"seed:{os.path.abspath(csv_file)}"
+    try:
+        size = os.path.getsize(csv_file)
+        create_checkpoint_table(connection)
+        start = None
+        position = load_checkpoint(connection, checkpoint)
+        if position:
+            offset, _, seen_size = position.partition("/")
+            # A checkpoint taken against a different file version is ignored;
+            # deterministic user_ids keep the full reload idempotent.
+            if seen_size == str(size):
+                start = int(offset)
+        if start is not None and start >= size:
+            print("Data already inserted")
+            return
+
+        cursor = connection.cursor()
+        for batch in mmap_csv.read_batches(csv_file, batch_size, start):
+            data_to_insert = [
+                (user_id_for(email), name, email, age)
+                for name, email, age in batch.rows('name', 'email', 'age')
+            ]
+            if data_to_insert:
+                cursor.executemany(
+                    "INSERT IGNORE INTO user_data (user_id, name, email, age) VALUES (%s, %s, %s, %s);",
+                    data_to_insert
+                )
+            save_checkpoint(cursor, checkpoint, f"{batch.end}/{size}")
+            connection.commit()
+        cursor.close()
+        print("Data inserted successfully")
+    except FileNotFoundError:
+        print(f"CSV file '{csv_file}' not found")
+    except Error as e:
+        connection.rollback()
+        print(f"Error inserting data: {e}")
@@ -0,0 +1,125 @@
+"""
+Composable, lazily evaluated operators over any row stream.
+
+    adults = (Stream(stream_users())
+              .filter(lambda u: u["age"] > 25)
+              .map(lambda u: u["email"])
+              .dedupe()
+              .batch(500))
+    for emails in adults:
+        ...
+
+Nothing runs until the stream is iterated. Each operator wraps the
+iterator before it; map, filter and take are the built-in C iterators,
+so only dedupe, batch, window and group_by add a generator frame per
+row, and no intermediate lists are built.
+"""
+from collections import deque
+from functools import reduce
+from itertools import groupby, islice
+
+
+def _dedupe(source, key):
+    seen = set()
+    for item in source:
+        marker = key(item) if key is not None else item
+        if marker not in seen:
+            seen.add(marker)
+            yield item
+
+
+def _batch(source, size):
+    iterator = iter(source)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _window(source, size, step):
+    iterator = iter(source)
+    window = deque(islice(iterator, size), maxlen=size)
+    if len(window) < size:
+        return
+    yield tuple(window)
+    while True:
+        added = 0
+        for item in islice(iterator, step):
+            window.append(item)
+            added += 1
+        if added < step:
+            return
+        yield tuple(window)
+
+
+def _group_by(source, key):
+    for group_key, items in groupby(source, key):
+        yield group_key, list(items)
+
+
+class Stream:
+    def __init__(self, source, steps=()):
+        self._source = source
+        self._steps = tuple(steps)
+
+    def _then(self, kind, *args):
+        return Stream(self._source, self._steps + ((kind, *args),))
+
+    def map(self, func):
+        return self._then("map", func)
+
+    def filter(self, predicate):
+        return self._then("filter", predicate)
+
+    def dedupe(self, key=None):
+        """Drop items whose key (the item itself by default) was already seen."""
+        return self._then("dedupe", key)
+
+    def take(self, count):
+        return self._then("take", count)
+
+    def batch(self, size):
+        """Group items into lists of `size`; the last list may be shorter."""
+        if size < 1:
+            raise ValueError("batch size must be at least 1")
+        return self._then("batch", size)
+
+    def window(self, size, step=1):
+        """Sliding tuples of `size` items, advancing `step` items at a time."""
+        if size < 1 or step < 1:
+            raise ValueError("window size and step must be at least 1")
+        return self._then("window", size, step)
+
+    def group_by(self, key):
+        """(key, [items]) for runs of equal keys; input must be sorted by key."""
+        return self._then("group_by", key)
+
+    def __iter__(self):
+        iterator = iter(self._source)
+        for kind, *args in self._steps:
+            if kind == "map":
+                iterator = map(args[0], iterator)
+            elif kind == "filter":
+                iterator = filter(args[0], iterator)
+            elif kind == "dedupe":
+                iterator = _dedupe(iterator, args[0])
+            elif kind == "take":
+                iterator = islice(iterator, args[0])
+            elif kind == "batch":
+                iterator = _batch(iterator, args[0])
+            elif kind == "window":
+                iterator = _window(iterator, *args)
+            elif kind == "group_by":
+                iterator = _group_by(iterator, args[0])
+        return iterator
+
+    def to_list(self):
+        return list(self)
+
+    def count(self):
+        last = deque(enumerate(self, 1), maxlen=1)
+        return last[0][0] if last else 0
+
+    def reduce(self, func, initial):
+        return reduce(func, self, initial)
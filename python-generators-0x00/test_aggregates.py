@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Unit tests for aggregates.py.
+"""
+import random
+import sqlite3
+import statistics
+import unittest
+from aggregates import (ReservoirQuantiles, RunningStats, pushdown_aggregates,
+                        streaming_aggregates)
+from predicates import Col
+
+_random = random.Random(7)
+AGES = [_random.randint(18, 90) for _ in range(1001)]
+
+
+class SQLiteCursor:
+    """Cursor accepting the MySQL paramstyle, over sqlite3."""
+
+    def __init__(self, connection):
+        self._cursor = connection.cursor()
+
+    def execute(self, sql, params=None):
+        self._cursor.execute(sql.replace("%s", "?"), params or ())
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """Enough of a MySQL connection for pushdown_aggregates()."""
+
+    def __init__(self, rows):
+        self._connection = sqlite3.connect(":memory:")
+        self._connection.execute("CREATE TABLE user_data (name TEXT, age INTEGER)")
+        self._connection.executemany("INSERT INTO user_data VALUES (?, ?)", rows)
+
+    def cursor(self):
+        return SQLiteCursor(self._connection)
+
+    def close(self):
+        self._connection.close()
+
+
+class TestRunningStats(unittest.TestCase):
+    """Test cases for RunningStats."""
+
+    def test_matches_statistics(self):
+        """Test count, mean, variance, min and max against the stdlib."""
+        stats = RunningStats().update(AGES)
+        self.assertEqual(stats.count, len(AGES))
+        self.assertAlmostEqual(stats.mean, statistics.fmean(AGES))
+        self.assertAlmostEqual(stats.variance, statistics.pvariance(AGES))
+        self.assertAlmostEqual(stats.stddev, statistics.pstdev(AGES))
+        self.assertEqual((stats.min, stats.max), (min(AGES), max(AGES)))
+
+    def test_numerically_stable(self):
+        """Test a small variance around a large mean."""
+        values = [1e9 + x for x in (4, 7, 13, 16)]
+        self.assertAlmostEqual(RunningStats().update(values).variance, 22.5)
+
+    def test_empty(self):
+        """Test the aggregates of no values."""
+        self.assertEqual(RunningStats().as_dict(),
+                         {"count": 0, "avg": None, "min": None, "max": None,
+                          "variance": 0.0})
+
+
+class TestReservoirQuantiles(unittest.TestCase):
+    """Test cases for ReservoirQuantiles."""
+
+    def test_exact_while_sample_holds_everything(self):
+        """Test nearest-rank percentiles when nothing was dropped."""
+        quantiles = ReservoirQuantiles(size=100).update(range(1, 101))
+        self.assertEqual([quantiles.quantile(p) for p in (0, 1, 50, 99, 100)],
+                         [1, 1, 50, 99, 100])
+
+    def test_bounded_sample(self):
+        """Test that the sample never grows past its size."""
+        quantiles = ReservoirQuantiles(size=50, seed=1).update(range(10000))
+        self.assertEqual(len(quantiles.sample), 50)
+        self.assertEqual(quantiles.seen, 10000)
+        self.assertTrue(2500 < quantiles.quantile(50) < 7500)
+
+    def test_empty(self):
+        """Test that an empty reservoir has no quantiles."""
+        self.assertIsNone(ReservoirQuantiles().quantile(50))
+
+
+class TestPushdownAggregates(unittest.TestCase):
+    """Test cases for pushdown_aggregates, run against SQLite."""
+
+    def setUp(self):
+        self.connection = SQLiteConnection(
+            [("user%d" % i, age) for i, age in enumerate(AGES)]
+        )
+        self.addCleanup(self.connection.close)
+
+    def test_matches_streaming_aggregates(self):
+        """Test that SQL and single-pass results agree."""
+        pushed = pushdown_aggregates(self.connection, "age", percentiles=(50, 90))
+        streamed = streaming_aggregates(AGES, percentiles=(50, 90))
+        self.assertEqual(pushed["count"], streamed["count"])
+        self.assertAlmostEqual(pushed["avg"], streamed["avg"])
+        self.assertEqual((pushed["min"], pushed["max"]), (streamed["min"], streamed["max"]))
+        self.assertEqual((pushed["p50"], pushed["p90"]), (streamed["p50"], streamed["p90"]))
+
+    def test_where(self):
+        """Test that the predicate is applied to aggregates and percentiles."""
+        older = [age for age in AGES if age > 25]
+        pushed = pushdown_aggregates(self.connection, "age", ("count", "max"),
+                                     percentiles=(0,), where=Col("age") > 25)
+        self.assertEqual(pushed, {"count": len(older), "max": max(older),
+                                  "p0": min(older)})
+
+    def test_no_matching_rows(self):
+        """Test percentiles over an empty selection."""
+        pushed = pushdown_aggregates(self.connection, "age", ("count",),
+                                     percentiles=(50,), where=Col("age") > 1000)
+        self.assertEqual(pushed, {"count": 0, "p50": None})
+
+    def test_rejects_unknown_aggregate(self):
+        """Test that only the listed aggregates are accepted."""
+        with self.assertRaises(ValueError):
+            pushdown_aggregates(self.connection, "age", ("median",))
+
+    def test_rejects_unsafe_column(self):
+        """Test that the column name is validated."""
+        with self.assertRaises(ValueError):
+            pushdown_aggregates(self.connection, "age) FROM user_data; --")
+
+
+if __name__ == "__main__":
+    unittest.main()
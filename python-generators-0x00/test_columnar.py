@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Unit tests for columnar.py.
+"""
+import unittest
+from array import array
+from decimal import Decimal
+from unittest.mock import patch
+import columnar
+from columnar import UserBatch
+
+COLUMNS = ("user_id", "name", "email", "age")
+ROWS = [
+    ("id-1", "Alice", "alice@example.com", Decimal("31")),
+    ("id-2", "Bob", "bob@example.com", Decimal("19")),
+    ("id-3", "Carol", "carol@example.com", Decimal("25")),
+]
+
+
+class TestUserBatch(unittest.TestCase):
+    """Test cases for UserBatch, with and without NumPy."""
+
+    def each_backend(self):
+        """Yield once with NumPy (if installed) and once with it hidden."""
+        backends = [("numpy", columnar.np)] if columnar.np is not None else []
+        for name, np in backends + [("pure python", None)]:
+            with self.subTest(backend=name), patch.object(columnar, "np", np):
+                yield np
+
+    def test_from_rows(self):
+        """Test column types and row count."""
+        for np in self.each_backend():
+            batch = UserBatch.from_rows(COLUMNS, ROWS)
+            self.assertEqual(len(batch), 3)
+            self.assertEqual(batch.columns, COLUMNS)
+            self.assertEqual(list(batch["age"]), [31.0, 19.0, 25.0])
+            self.assertEqual(list(batch["name"]), ["Alice", "Bob", "Carol"])
+            if np is None:
+                self.assertIsInstance(batch["age"], array)
+                self.assertIsInstance(batch["name"], list)
+
+    def test_empty(self):
+        """Test a batch built from no rows."""
+        for _ in self.each_backend():
+            batch = UserBatch.from_rows(COLUMNS, [])
+            self.assertEqual(len(batch), 0)
+            self.assertEqual(list(batch), [])
+
+    def test_iter_rows(self):
+        """Test that iterating yields row dicts in column order."""
+        for _ in self.each_backend():
+            rows = list(UserBatch.from_rows(COLUMNS, ROWS))
+            self.assertEqual(rows[0], {"user_id": "id-1", "name": "Alice",
+                                       "email": "alice@example.com", "age": 31.0})
+
+    def test_filter(self):
+        """Test every comparison operator on a numeric column."""
+        cases = [
+            (">", 25, ["Alice"]),
+            (">=", 25, ["Alice", "Carol"]),
+            ("<", 25, ["Bob"]),
+            ("<=", 25, ["Bob", "Carol"]),
+            ("==", 25, ["Carol"]),
+            ("!=", 25, ["Alice", "Bob"]),
+        ]
+        for _ in self.each_backend():
+            batch = UserBatch.from_rows(COLUMNS, ROWS)
+            for op, value, names in cases:
+                with self.subTest(op=op):
+                    self.assertEqual(list(batch.filter("age", op, value)["name"]), names)
+
+    def test_filter_string_column(self):
+        """Test filtering on a string column keeps every column aligned."""
+        for _ in self.each_backend():
+            batch = UserBatch.from_rows(COLUMNS, ROWS).filter("name", "==", "Bob")
+            self.assertEqual([dict(row) for row in batch],
+                             [{"user_id": "id-2", "name": "Bob",
+                               "email": "bob@example.com", "age": 19.0}])
+
+    def test_take_with_list_mask(self):
+        """Test take() with a plain list of booleans."""
+        for _ in self.each_backend():
+            batch = UserBatch.from_rows(COLUMNS, ROWS).take([True, False, True])
+            self.assertEqual(list(batch["user_id"]), ["id-1", "id-3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Unit tests for export.py (the NDJSON path).
+"""
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import patch
+import export
+from columnar import UserBatch
+from export import default_path, export_users, read_export
+
+COLUMNS = ("user_id", "name", "age", "created_at")
+BATCHES = [
+    [
+        ("id-1", "Alice", Decimal("31"), datetime(2024, 1, 2, 3, 4, 5)),
+        ("id-2", "Bob", Decimal("19.5"), None),
+    ],
+    [
+        ("id-3", "Émile", Decimal("25"), datetime(2024, 6, 7, 8, 9, 10)),
+    ],
+]
+
+
+def user_batches():
+    """Yield one UserBatch per entry of BATCHES."""
+    for rows in BATCHES:
+        yield UserBatch.from_rows(COLUMNS, rows)
+
+
+class TestNdjsonExport(unittest.TestCase):
+    """Test cases for writing and reading .ndjson.gz/.ndjson.zst exports."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def test_round_trip(self):
+        """Test one chunk per batch, with types restored on read."""
+        suffixes = [".ndjson.gz"] + ([".ndjson.zst"] if export.zstandard else [])
+        for suffix in suffixes:
+            with self.subTest(suffix=suffix):
+                path = self.path("users" + suffix)
+                self.assertEqual(export_users(path, batches=user_batches()), 3)
+                batches = list(read_export(path))
+                self.assertEqual([len(batch) for batch in batches], [2, 1])
+                rows = [row for batch in batches for row in batch]
+                expected = [row for batch in user_batches() for row in batch]
+                self.assertEqual(rows, expected)
+                self.assertIsInstance(rows[0]["created_at"], datetime)
+                self.assertIsNone(rows[1]["created_at"])
+
+    def test_filter_after_read(self):
+        """Test that read batches work with UserBatch.filter."""
+        path = self.path("users.ndjson.gz")
+        export_users(path, batches=user_batches())
+        names = [name for batch in read_export(path)
+                 for name in batch.filter("age", ">", 20)["name"]]
+        self.assertEqual(names, ["Alice", "Émile"])
+
+    def test_empty_export(self):
+        """Test that no batches write an empty, readable file."""
+        path = self.path("users.ndjson.gz")
+        self.assertEqual(export_users(path, batches=iter([])), 0)
+        self.assertEqual(list(read_export(path)), [])
+
+    def test_unknown_suffix(self):
+        """Test that only known formats are accepted."""
+        with self.assertRaises(ValueError):
+            export_users(self.path("users.csv"), batches=user_batches())
+
+    def test_missing_optional_packages(self):
+        """Test the fallbacks when pyarrow or zstandard is not installed."""
+        with patch.object(export, "pq", None), patch.object(export, "zstandard", None):
+            self.assertEqual(default_path("users"), "users.ndjson.gz")
+            with self.assertRaises(RuntimeError):
+                export_users(self.path("users.ndjson.zst"), batches=user_batches())
+            with self.assertRaises(RuntimeError):
+                export_users(self.path("users.parquet"), batches=user_batches())
+            with self.assertRaises(RuntimeError):
+                read_export(self.path("users.parquet"))
+
+
+if __name__ == "__main__":
+    unittest.main()
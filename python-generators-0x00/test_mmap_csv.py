@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Unit tests for mmap_csv.py.
+"""
+import csv
+import io
+import os
+import tempfile
+import unittest
+from mmap_csv import read_batches
+
+ROWS = [
+    ["Ada Lovelace", "ada@example.com", "36"],
+    ["Grace \"Amazing\" Hopper", "grace@example.com", "85"],
+    ["Line\nBreak", "multi@example.com", "40"],
+    ["Comma, Inside", "comma@example.com", "21"],
+    ["Two\n\nBreaks \"quoted\"", "two@example.com", "50"],
+    ["Alan Turing", "alan@example.com", "41"],
+    ["Émilie du Châtelet", "emilie@example.com", "42"],
+]
+
+
+def write_csv(directory, rows, lineterminator="\n", bom=False, trailing_newline=True):
+    """Write name,email,age plus `rows` and return the file's path."""
+    out = io.StringIO(newline="")
+    writer = csv.writer(out, lineterminator=lineterminator)
+    writer.writerow(["name", "email", "age"])
+    writer.writerows(rows)
+    text = out.getvalue()
+    if not trailing_newline:
+        text = text[:-len(lineterminator)]
+    path = os.path.join(directory, "users.csv")
+    with open(path, "w", encoding="utf-8-sig" if bom else "utf-8", newline="") as f:
+        f.write(text)
+    return path
+
+
+class TestReadBatches(unittest.TestCase):
+    """Test cases for read_batches."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def read_all(self, path, batch_size, start=None):
+        return [list(row) for batch in read_batches(path, batch_size, start)
+                for row in batch.rows()]
+
+    def test_matches_csv_module(self):
+        """Test every batch size against the csv module, across line endings."""
+        variants = [
+            {"lineterminator": "\n"},
+            {"lineterminator": "\r\n"},
+            {"lineterminator": "\r\n", "bom": True},
+            {"lineterminator": "\n", "trailing_newline": False},
+        ]
+        for variant in variants:
+            path = write_csv(self.directory, ROWS, **variant)
+            for batch_size in (1, 2, 3, len(ROWS), 100):
+                with self.subTest(batch_size=batch_size, **variant):
+                    self.assertEqual(self.read_all(path, batch_size), ROWS)
+
+    def test_header_and_dicts(self):
+        """Test the header (without BOM) and DictReader-style rows."""
+        path = write_csv(self.directory, ROWS[:1], lineterminator="\r\n", bom=True)
+        batch = next(read_batches(path))
+        self.assertEqual(batch.header, ("name", "email", "age"))
+        self.assertEqual(list(batch), [{"name": "Ada Lovelace", "email": "ada@example.com",
+                                        "age": "36"}])
+        self.assertEqual(batch.column("age"), ("36",))
+        self.assertEqual(len(batch), 1)
+
+    def test_quoted_newline_does_not_split_a_batch(self):
+        """Test that every batch holds whole records only."""
+        path = write_csv(self.directory, ROWS)
+        for batch in read_batches(path, batch_size=1):
+            self.assertEqual(len(batch), 1)
+
+    def test_resume_from_end_offset(self):
+        """Test that `start` resumes right after a previous batch."""
+        path = write_csv(self.directory, ROWS, lineterminator="\r\n")
+        batches = read_batches(path, batch_size=3)
+        first = next(batches)
+        batches.close()
+        resumed = self.read_all(path, 3, start=first.end)
+        self.assertEqual([list(row) for row in first.rows()] + resumed, ROWS)
+
+    def test_empty_files(self):
+        """Test a zero-byte file and a header-only file."""
+        path = os.path.join(self.directory, "empty.csv")
+        open(path, "wb").close()
+        self.assertEqual(list(read_batches(path)), [])
+        path = write_csv(self.directory, [])
+        self.assertEqual(list(read_batches(path)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Unit tests for parallel_map.py.
+"""
+import time
+import unittest
+from parallel_map import parallel_map
+
+BATCHES = [[n * 10 + i for i in range(3)] for n in range(8)]
+
+
+def double(value):
+    """Per-row worker function."""
+    return value * 2
+
+
+def total(batch):
+    """Per-batch worker function."""
+    return sum(batch)
+
+
+def slow_first(value):
+    """Make batch 0 finish after the others."""
+    if value == 0:
+        time.sleep(0.5)
+    return value
+
+
+class TestParallelMap(unittest.TestCase):
+    """Test cases for parallel_map."""
+
+    def test_ordered(self):
+        """Test results come back in input order."""
+        results = list(parallel_map(double, BATCHES, workers=2, max_in_flight=3))
+        self.assertEqual(results, [[value * 2 for value in batch] for batch in BATCHES])
+
+    def test_per_batch(self):
+        """Test func is called once per batch when per_batch is set."""
+        results = list(parallel_map(total, BATCHES, workers=2, per_batch=True))
+        self.assertEqual(results, [sum(batch) for batch in BATCHES])
+
+    def test_unordered(self):
+        """Test every result is yielded, fastest first."""
+        batches = [[0]] + [[n] for n in range(1, 6)]
+        results = list(parallel_map(slow_first, batches, workers=2, ordered=False))
+        self.assertEqual(sorted(results), batches)
+        self.assertNotEqual(results[0], [0])
+
+    def test_empty_source(self):
+        """Test that no batches yield no results."""
+        self.assertEqual(list(parallel_map(double, [], workers=1)), [])
+
+    def test_early_close_stops_reading_source(self):
+        """Test backpressure: closing early leaves the rest of the source unread."""
+        pulled = []
+
+        def source():
+            for batch in BATCHES:
+                pulled.append(batch)
+                yield batch
+
+        for ordered in (True, False):
+            pulled.clear()
+            with self.subTest(ordered=ordered):
+                results = parallel_map(double, source(), workers=1, max_in_flight=2,
+                                       ordered=ordered)
+                next(results)
+                results.close()
+                self.assertLessEqual(len(pulled), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Unit tests for predicates.py.
+"""
+import unittest
+from unittest.mock import patch
+import columnar
+import predicates
+from columnar import UserBatch
+from predicates import Col, Compare, In, Predicate, quote_identifier, where_clause
+
+ROWS = [
+    {"name": "Ada", "age": 36},
+    {"name": "Linus", "age": 21},
+    {"name": "Grace", "age": 85},
+    {"name": "Alan", "age": 25},
+]
+WHERE = [
+    Col("age") > 25,
+    Col("age") <= 25,
+    Col("name") == "Ada",
+    Col("name") != "Ada",
+    Col("name").isin(["Ada", "Alan"]),
+    Col("name").isin([]),
+    (Col("age") > 25) & Col("name").isin(["Ada", "Linus"]),
+    (Col("age") < 22) | (Col("name") == "Grace"),
+]
+
+
+class TestToSql(unittest.TestCase):
+    """Test cases for compiling predicates to SQL."""
+
+    def test_clauses(self):
+        """Test clause text and parameter order."""
+        cases = [
+            (Col("age") > 25, "`age` > %s", [25]),
+            (Col("age") == 25, "`age` = %s", [25]),
+            (Col("age") != 25, "`age` <> %s", [25]),
+            (Col("name").isin(["Ada", "Linus"]), "`name` IN (%s, %s)", ["Ada", "Linus"]),
+            (Col("name").isin([]), "1 = 0", []),
+            ((Col("age") > 25) & Col("name").isin(["Ada"]),
+             "(`age` > %s AND `name` IN (%s))", [25, "Ada"]),
+            ((Col("age") < 18) | (Col("age") >= 65),
+             "(`age` < %s OR `age` >= %s)", [18, 65]),
+        ]
+        for where, clause, params in cases:
+            with self.subTest(clause=clause):
+                self.assertEqual(where.to_sql(), (clause, params))
+
+    def test_where_clause(self):
+        """Test the WHERE prefix and the no-predicate case."""
+        self.assertEqual(where_clause(None), ("", []))
+        self.assertEqual(where_clause(Col("age") > 25), (" WHERE `age` > %s", [25]))
+
+    def test_rejects_unsafe_identifiers(self):
+        """Test that column names are validated before reaching SQL."""
+        for name in ("age; DROP TABLE users", "`age`", "1age", ""):
+            with self.subTest(name=name):
+                with self.assertRaises(ValueError):
+                    Col(name)
+                with self.assertRaises(ValueError):
+                    quote_identifier(name)
+
+    def test_rejects_unknown_operator(self):
+        """Test that Compare only accepts the supported operators."""
+        with self.assertRaises(ValueError):
+            Compare("age", "LIKE", "1%")
+
+    def test_predicate_is_abstract(self):
+        """Test that an incomplete Predicate subclass cannot be created."""
+        class OnlySql(Predicate):
+            def to_sql(self):
+                return "1 = 1", []
+
+        with self.assertRaises(TypeError):
+            OnlySql()
+
+
+class TestEvaluate(unittest.TestCase):
+    """Test cases for evaluating predicates in Python."""
+
+    def test_evaluate(self):
+        """Test row-by-row evaluation."""
+        where = (Col("age") > 25) & Col("name").isin(["Ada", "Linus"])
+        self.assertEqual([where.evaluate(row) for row in ROWS], [True, False, False, False])
+
+    def test_filter_row_dicts(self):
+        """Test filter() on a list of row dicts."""
+        where = (Col("age") < 22) | (Col("name") == "Grace")
+        self.assertEqual(where.filter(ROWS), [ROWS[1], ROWS[2]])
+
+    def test_mask_matches_evaluate(self):
+        """Test that a UserBatch is filtered exactly like the row dicts."""
+        backends = [columnar.np] if columnar.np is not None else []
+        for np in backends + [None]:
+            with patch.object(columnar, "np", np), patch.object(predicates, "np", np):
+                batch = UserBatch.from_rows(("name", "age"),
+                                            [(row["name"], row["age"]) for row in ROWS])
+                for where in WHERE:
+                    with self.subTest(numpy=np is not None, sql=where.to_sql()[0]):
+                        expected = [row["name"] for row in ROWS if where.evaluate(row)]
+                        self.assertEqual(list(where.filter(batch)["name"]), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
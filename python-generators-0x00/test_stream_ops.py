@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Unit tests for stream_ops.py.
+"""
+import itertools
+import unittest
+from stream_ops import Stream
+
+USERS = [
+    {"name": "Ada", "email": "ada@example.com", "age": 36},
+    {"name": "Linus", "email": "linus@example.com", "age": 21},
+    {"name": "Ada", "email": "ada2@example.com", "age": 52},
+    {"name": "Grace", "email": "grace@example.com", "age": 85},
+    {"name": "Alan", "email": "alan@example.com", "age": 25},
+]
+
+
+class TestStream(unittest.TestCase):
+    """Test cases for Stream operators."""
+
+    def test_map_filter(self):
+        """Test chained map and filter steps."""
+        emails = (Stream(USERS).filter(lambda u: u["age"] > 25)
+                  .map(lambda u: u["email"]).to_list())
+        self.assertEqual(emails, ["ada@example.com", "ada2@example.com", "grace@example.com"])
+
+    def test_dedupe(self):
+        """Test dedupe by value and by key."""
+        self.assertEqual(Stream([3, 1, 3, 2, 1]).dedupe().to_list(), [3, 1, 2])
+        names = Stream(USERS).dedupe(lambda u: u["name"]).map(lambda u: u["email"])
+        self.assertEqual(names.to_list(), ["ada@example.com", "linus@example.com",
+                                           "grace@example.com", "alan@example.com"])
+
+    def test_dedupe_after_map(self):
+        """Test that each dedupe step keeps its own seen set."""
+        stream = (Stream(USERS).map(lambda u: u["name"]).dedupe()
+                  .map(str.upper).dedupe(len))
+        self.assertEqual(stream.to_list(), ["ADA", "LINUS", "ALAN"])
+
+    def test_take(self):
+        """Test take() stops reading the source early."""
+        self.assertEqual(Stream(itertools.count()).map(lambda n: n * 2).take(3).to_list(),
+                         [0, 2, 4])
+
+    def test_batch(self):
+        """Test fixed-size lists with a short last one."""
+        self.assertEqual(Stream(range(7)).batch(3).to_list(), [[0, 1, 2], [3, 4, 5], [6]])
+        with self.assertRaises(ValueError):
+            Stream(range(7)).batch(0)
+
+    def test_window(self):
+        """Test sliding windows with a step."""
+        self.assertEqual(Stream(range(5)).window(3).to_list(),
+                         [(0, 1, 2), (1, 2, 3), (2, 3, 4)])
+        self.assertEqual(Stream(range(7)).window(3, step=2).to_list(),
+                         [(0, 1, 2), (2, 3, 4), (4, 5, 6)])
+        self.assertEqual(Stream(range(2)).window(3).to_list(), [])
+        with self.assertRaises(ValueError):
+            Stream(range(5)).window(3, step=0)
+
+    def test_group_by(self):
+        """Test runs of equal keys."""
+        groups = Stream(sorted(u["age"] // 10 for u in USERS)).group_by(lambda d: d)
+        self.assertEqual(groups.to_list(), [(2, [2, 2]), (3, [3]), (5, [5]), (8, [8])])
+
+    def test_lazy_and_reusable(self):
+        """Test nothing runs before iteration and a stream over a list can be re-read."""
+        calls = []
+        stream = Stream(USERS).map(lambda u: calls.append(u) or u["age"])
+        self.assertEqual(calls, [])
+        self.assertEqual(stream.count(), 5)
+        self.assertEqual(stream.count(), 5)
+        self.assertEqual(stream.reduce(lambda total, age: total + age, 0), 219)
+
+    def test_count_empty(self):
+        """Test count() of an empty stream."""
+        self.assertEqual(Stream([]).filter(bool).count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()